@@ -9,7 +9,10 @@ from .security import (
     check_rate_limit, check_brute_force, record_failed_attempt, clear_failed_attempts,
     sanitize_input
 )
-from .database import init_api_v1_db, close_api_v1_db, get_pool, fetch_one, fetch_all, execute
+from .database import (
+    init_api_v1_db, close_api_v1_db, get_pool, fetch_one, fetch_all, fetch_records,
+    fetch_one_ro, fetch_all_ro, fetch_records_ro, execute
+)
 
 __all__ = [
     "get_api_settings", "ErrorCodes", "DEFAULT_BONUS_RULES", "APIv1Settings",
@@ -18,5 +21,6 @@ __all__ = [
     "create_jwt_token", "decode_jwt_token", "generate_hmac_signature", "verify_hmac_signature",
     "check_rate_limit", "check_brute_force", "record_failed_attempt", "clear_failed_attempts",
     "sanitize_input",
-    "init_api_v1_db", "close_api_v1_db", "get_pool", "fetch_one", "fetch_all", "execute"
+    "init_api_v1_db", "close_api_v1_db", "get_pool", "fetch_one", "fetch_all", "fetch_records",
+    "fetch_one_ro", "fetch_all_ro", "fetch_records_ro", "execute"
 ]
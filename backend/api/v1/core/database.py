@@ -16,6 +16,14 @@ settings = get_api_settings()
 
 # Connection pool
 _pool: Optional[asyncpg.Pool] = None
+# Order rollup counters are spread over this many rows (power of two)
+ORDER_ROLLUP_STRIPES = 16
+
+# Read replica pool (None = reads go to the primary pool)
+_read_pool: Optional[asyncpg.Pool] = None
+
+# Errors that mean the replica is unreachable, not that the query is wrong
+_READ_POOL_FALLBACK_ERRORS = (OSError, asyncpg.PostgresConnectionError, asyncpg.InterfaceError)
 
 
 async def get_pool() -> asyncpg.Pool:
@@ -31,13 +39,15 @@ async def init_api_v1_db():
     global _pool
     
     logger.info("Initializing unified database...")
-    logger.info(f"Database pool config: min={settings.db_pool_min}, max={settings.db_pool_max}, timeout={settings.db_command_timeout}")
+    logger.info(f"Database pool config: min={settings.db_pool_min}, max={settings.db_pool_max}, timeout={settings.db_command_timeout}, pgbouncer={settings.db_pgbouncer}")
     
     _pool = await asyncpg.create_pool(
         settings.database_url,
         min_size=settings.db_pool_min,
         max_size=settings.db_pool_max,
-        command_timeout=settings.db_command_timeout
+        command_timeout=settings.db_command_timeout,
+        max_inactive_connection_lifetime=settings.db_max_inactive_connection_lifetime,
+        statement_cache_size=0 if settings.db_pgbouncer else settings.db_statement_cache_size
     )
     
     async with _pool.acquire() as conn:
@@ -406,10 +416,25 @@ async def init_api_v1_db():
                 default_deposit_bonus FLOAT DEFAULT 0.0,
                 signup_bonus FLOAT DEFAULT 0.0,
                 default_referral_bonus FLOAT DEFAULT 5.0,
+                deposit_block_balance FLOAT DEFAULT 5.0,
+                min_cashout_multiplier FLOAT DEFAULT 1.0,
+                max_cashout_multiplier FLOAT DEFAULT 3.0,
                 updated_at TIMESTAMPTZ DEFAULT NOW()
             )
         ''')
         
+        # Add missing columns to system_settings table (for existing databases)
+        settings_columns = [
+            ("deposit_block_balance", "FLOAT DEFAULT 5.0"),
+            ("min_cashout_multiplier", "FLOAT DEFAULT 1.0"),
+            ("max_cashout_multiplier", "FLOAT DEFAULT 3.0"),
+        ]
+        for col_name, col_def in settings_columns:
+            try:
+                await conn.execute(f'ALTER TABLE system_settings ADD COLUMN IF NOT EXISTS {col_name} {col_def}')
+            except Exception as e:
+                logger.debug(f"Column {col_name} may already exist: {e}")
+        
         # ==================== AUDIT LOGS ====================
         await conn.execute('''
             CREATE TABLE IF NOT EXISTS audit_logs (
@@ -495,8 +520,34 @@ async def init_api_v1_db():
         await conn.execute('CREATE INDEX IF NOT EXISTS idx_orders_status ON orders(status)')
         await conn.execute('CREATE INDEX IF NOT EXISTS idx_orders_idempotency ON orders(idempotency_key)')
         await conn.execute('CREATE INDEX IF NOT EXISTS idx_rules_type_scope ON rules(rule_type, scope)')
-        await conn.execute('CREATE INDEX IF NOT EXISTS idx_audit_created ON audit_logs(created_at DESC)')
         await conn.execute('CREATE INDEX IF NOT EXISTS idx_audit_user ON audit_logs(user_id)')
+        # Filter + ORDER BY created_at DESC LIMIT paths (admin lists)
+        await conn.execute('CREATE INDEX IF NOT EXISTS idx_users_created ON users(created_at DESC, user_id DESC)')
+        await conn.execute('CREATE INDEX IF NOT EXISTS idx_orders_created ON orders(created_at DESC, order_id DESC)')
+        await conn.execute('CREATE INDEX IF NOT EXISTS idx_orders_status_created ON orders(status, created_at DESC)')
+        await conn.execute('CREATE INDEX IF NOT EXISTS idx_orders_type_created ON orders(order_type, created_at DESC)')
+        await conn.execute('CREATE INDEX IF NOT EXISTS idx_orders_user_created ON orders(user_id, created_at DESC)')
+        await conn.execute('CREATE INDEX IF NOT EXISTS idx_audit_created_id ON audit_logs(created_at DESC, log_id DESC)')
+        # Superseded by idx_audit_created_id (same leading column)
+        await conn.execute('DROP INDEX IF EXISTS idx_audit_created')
+        # Small partial index: the suspicious-only order filter joins through it
+        await conn.execute('CREATE INDEX IF NOT EXISTS idx_users_suspicious ON users(user_id) WHERE is_suspicious = TRUE')
+        await conn.execute('CREATE INDEX IF NOT EXISTS idx_audit_user_created ON audit_logs(user_id, created_at DESC)')
+        await conn.execute('CREATE INDEX IF NOT EXISTS idx_audit_resource_created ON audit_logs(resource_type, created_at DESC)')
+        await conn.execute('CREATE INDEX IF NOT EXISTS idx_perks_code_active ON referral_perks(referral_code, is_active)')
+        
+        # Trigram indexes so the admin client search (ILIKE '%term%' on
+        # each column) avoids a sequential scan of users. pg_trgm may not be
+        # installable on every host; search still works without it.
+        try:
+            await conn.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            for col_name in ('username', 'referral_code', 'display_name', 'email'):
+                await conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS idx_users_{col_name}_trgm '
+                    f'ON users USING GIN ({col_name} gin_trgm_ops)'
+                )
+        except Exception as e:
+            logger.warning(f"Trigram search indexes not created: {e}")
         
         # ==================== SEED DEFAULT DATA ====================
         # Seed games if empty
@@ -676,12 +727,191 @@ async def init_api_v1_db():
         await conn.execute('CREATE INDEX IF NOT EXISTS idx_notification_logs_event ON notification_logs(event_type)')
         await conn.execute('CREATE INDEX IF NOT EXISTS idx_notification_logs_created ON notification_logs(created_at)')
         
+        # ==================== ORDER ROLLUPS (ADMIN DASHBOARD) ====================
+        # Pending counts and approved money flow, kept current by triggers on
+        # orders so the dashboard reads a few rows instead of scanning orders.
+        # Counters are striped across ORDER_ROLLUP_STRIPES rows by a hash of
+        # order_id, so concurrent order writes lock different rows; readers
+        # SUM the stripes.
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS order_rollup_totals (
+                stripe SMALLINT PRIMARY KEY,
+                pending_total BIGINT NOT NULL DEFAULT 0,
+                pending_deposits BIGINT NOT NULL DEFAULT 0,
+                pending_withdrawals BIGINT NOT NULL DEFAULT 0,
+                deposits_in NUMERIC NOT NULL DEFAULT 0,
+                withdrawals_out NUMERIC NOT NULL DEFAULT 0
+            )
+        ''')
+        
+        # Approved flow per UTC day of approved_at
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS order_rollup_daily (
+                day DATE NOT NULL,
+                stripe SMALLINT NOT NULL,
+                deposits_in NUMERIC NOT NULL DEFAULT 0,
+                withdrawals_out NUMERIC NOT NULL DEFAULT 0,
+                voided NUMERIC NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, stripe)
+            )
+        ''')
+        
+        # Adds (sign = 1) or removes (sign = -1) one order's contribution.
+        # NUMERIC keeps add/remove of the same FLOAT amount exact.
+        await conn.execute(f'''
+            CREATE OR REPLACE FUNCTION order_rollup_apply(
+                p_order_id TEXT, p_type TEXT, p_status TEXT, p_amount FLOAT8, p_payout FLOAT8,
+                p_void FLOAT8, p_approved_at TIMESTAMPTZ, p_sign INT
+            ) RETURNS VOID AS $$
+            DECLARE
+                is_pending BOOLEAN := COALESCE(p_status IN ('pending_review', 'awaiting_payment_proof'), FALSE);
+                is_approved BOOLEAN := COALESCE(p_status IN ('approved', 'APPROVED_EXECUTED'), FALSE);
+                p_stripe SMALLINT := hashtext(p_order_id) & {ORDER_ROLLUP_STRIPES - 1};
+                dep NUMERIC := 0;
+                wd NUMERIC := 0;
+                vd NUMERIC := 0;
+            BEGIN
+                IF NOT is_pending AND NOT is_approved THEN
+                    RETURN;
+                END IF;
+                IF is_approved THEN
+                    dep := CASE WHEN p_type = 'deposit' THEN COALESCE(p_amount, 0)::NUMERIC ELSE 0 END * p_sign;
+                    wd := CASE WHEN p_type = 'withdrawal' THEN COALESCE(p_payout, 0)::NUMERIC ELSE 0 END * p_sign;
+                    vd := COALESCE(p_void, 0)::NUMERIC * p_sign;
+                END IF;
+                
+                UPDATE order_rollup_totals SET
+                    pending_total = pending_total + CASE WHEN is_pending THEN p_sign ELSE 0 END,
+                    pending_deposits = pending_deposits + CASE WHEN is_pending AND p_type = 'deposit' THEN p_sign ELSE 0 END,
+                    pending_withdrawals = pending_withdrawals + CASE WHEN is_pending AND p_type = 'withdrawal' THEN p_sign ELSE 0 END,
+                    deposits_in = deposits_in + dep,
+                    withdrawals_out = withdrawals_out + wd
+                WHERE stripe = p_stripe;
+                
+                IF is_approved AND p_approved_at IS NOT NULL THEN
+                    INSERT INTO order_rollup_daily (day, stripe, deposits_in, withdrawals_out, voided)
+                    VALUES ((p_approved_at AT TIME ZONE 'UTC')::DATE, p_stripe, dep, wd, vd)
+                    ON CONFLICT (day, stripe) DO UPDATE SET
+                        deposits_in = order_rollup_daily.deposits_in + EXCLUDED.deposits_in,
+                        withdrawals_out = order_rollup_daily.withdrawals_out + EXCLUDED.withdrawals_out,
+                        voided = order_rollup_daily.voided + EXCLUDED.voided;
+                END IF;
+            END;
+            $$ LANGUAGE plpgsql
+        ''')
+        
+        await conn.execute('''
+            CREATE OR REPLACE FUNCTION order_rollup_trigger() RETURNS TRIGGER AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    PERFORM order_rollup_apply(OLD.order_id, OLD.order_type, OLD.status, OLD.amount,
+                                               OLD.payout_amount, OLD.void_amount, OLD.approved_at, -1);
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    PERFORM order_rollup_apply(NEW.order_id, NEW.order_type, NEW.status, NEW.amount,
+                                               NEW.payout_amount, NEW.void_amount, NEW.approved_at, 1);
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        ''')
+        
+        await conn.execute('''
+            CREATE OR REPLACE TRIGGER trg_orders_rollup_insert_delete
+            AFTER INSERT OR DELETE ON orders
+            FOR EACH ROW EXECUTE FUNCTION order_rollup_trigger()
+        ''')
+        # Updates that leave the rolled-up columns alone skip the trigger
+        await conn.execute('''
+            CREATE OR REPLACE TRIGGER trg_orders_rollup_update
+            AFTER UPDATE ON orders
+            FOR EACH ROW
+            WHEN (
+                OLD.order_id IS DISTINCT FROM NEW.order_id
+                OR OLD.status IS DISTINCT FROM NEW.status
+                OR OLD.order_type IS DISTINCT FROM NEW.order_type
+                OR OLD.amount IS DISTINCT FROM NEW.amount
+                OR OLD.payout_amount IS DISTINCT FROM NEW.payout_amount
+                OR OLD.void_amount IS DISTINCT FROM NEW.void_amount
+                OR OLD.approved_at IS DISTINCT FROM NEW.approved_at
+            )
+            EXECUTE FUNCTION order_rollup_trigger()
+        ''')
+        
+        # First start with the triggers: seed the rollups from existing orders.
+        # The lock keeps order writes (and other workers seeding) out until the
+        # seed commits; re-check once it is held.
+        seeded_sql = "SELECT COUNT(*) = $1 FROM order_rollup_totals"
+        if not await conn.fetchval(seeded_sql, ORDER_ROLLUP_STRIPES):
+            async with conn.transaction():
+                await conn.execute('LOCK TABLE orders IN SHARE ROW EXCLUSIVE MODE')
+                if not await conn.fetchval(seeded_sql, ORDER_ROLLUP_STRIPES):
+                    await conn.execute('DELETE FROM order_rollup_totals')
+                    await conn.execute('''
+                        INSERT INTO order_rollup_totals (
+                            stripe, pending_total, pending_deposits, pending_withdrawals, deposits_in, withdrawals_out
+                        )
+                        SELECT s.stripe,
+                            COALESCE(a.pending_total, 0), COALESCE(a.pending_deposits, 0),
+                            COALESCE(a.pending_withdrawals, 0), COALESCE(a.deposits_in, 0),
+                            COALESCE(a.withdrawals_out, 0)
+                        FROM generate_series(0, $1 - 1) AS s(stripe)
+                        LEFT JOIN (
+                            SELECT hashtext(order_id) & ($1 - 1) AS stripe,
+                                COUNT(*) FILTER (WHERE status IN ('pending_review', 'awaiting_payment_proof')) AS pending_total,
+                                COUNT(*) FILTER (WHERE status IN ('pending_review', 'awaiting_payment_proof') AND order_type = 'deposit') AS pending_deposits,
+                                COUNT(*) FILTER (WHERE status IN ('pending_review', 'awaiting_payment_proof') AND order_type = 'withdrawal') AS pending_withdrawals,
+                                SUM(amount::NUMERIC) FILTER (WHERE order_type = 'deposit' AND status IN ('approved', 'APPROVED_EXECUTED')) AS deposits_in,
+                                SUM(payout_amount::NUMERIC) FILTER (WHERE order_type = 'withdrawal' AND status IN ('approved', 'APPROVED_EXECUTED')) AS withdrawals_out
+                            FROM orders
+                            GROUP BY 1
+                        ) a ON a.stripe = s.stripe
+                    ''', ORDER_ROLLUP_STRIPES)
+                    await conn.execute('DELETE FROM order_rollup_daily')
+                    await conn.execute('''
+                        INSERT INTO order_rollup_daily (day, stripe, deposits_in, withdrawals_out, voided)
+                        SELECT (approved_at AT TIME ZONE 'UTC')::DATE, hashtext(order_id) & ($1 - 1),
+                            COALESCE(SUM(amount::NUMERIC) FILTER (WHERE order_type = 'deposit'), 0),
+                            COALESCE(SUM(payout_amount::NUMERIC) FILTER (WHERE order_type = 'withdrawal'), 0),
+                            COALESCE(SUM(void_amount::NUMERIC), 0)
+                        FROM orders
+                        WHERE status IN ('approved', 'APPROVED_EXECUTED') AND approved_at IS NOT NULL
+                        GROUP BY 1, 2
+                    ''', ORDER_ROLLUP_STRIPES)
+                    logger.info("Order rollups seeded from existing orders")
+        
         logger.info("Unified database initialized successfully")
+    
+    await _init_read_pool()
+
+
+async def _init_read_pool():
+    """Connect the read replica pool if DATABASE_READ_URL is set"""
+    global _read_pool
+    
+    if not settings.database_read_url:
+        return
+    try:
+        _read_pool = await asyncpg.create_pool(
+            settings.database_read_url,
+            min_size=settings.db_pool_min,
+            max_size=settings.db_pool_max,
+            command_timeout=settings.db_command_timeout,
+            max_inactive_connection_lifetime=settings.db_max_inactive_connection_lifetime,
+            statement_cache_size=0 if settings.db_pgbouncer else settings.db_statement_cache_size
+        )
+        logger.info("Read replica pool connected")
+    except _READ_POOL_FALLBACK_ERRORS as e:
+        _read_pool = None
+        logger.warning(f"Read replica unavailable, reads use the primary: {e}")
 
 
 async def close_api_v1_db():
     """Close the database connection pool"""
-    global _pool
+    global _pool, _read_pool
+    if _read_pool:
+        await _read_pool.close()
+        _read_pool = None
     if _pool:
         await _pool.close()
         _pool = None
@@ -706,6 +936,43 @@ async def fetch_all(query: str, *args) -> List[Dict]:
         return [dict(row) for row in rows]
 
 
+async def fetch_records(query: str, *args) -> List[asyncpg.Record]:
+    """Fetch all rows as asyncpg Records (no per-row dict copy)"""
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        return await conn.fetch(query, *args)
+
+
+async def _fetch_ro(method: str, query: str, *args):
+    """Run a read on the replica pool, falling back to the primary if it is unreachable"""
+    if _read_pool is not None:
+        try:
+            async with _read_pool.acquire() as conn:
+                return await getattr(conn, method)(query, *args)
+        except _READ_POOL_FALLBACK_ERRORS as e:
+            logger.warning(f"Read replica query failed, retrying on primary: {e}")
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        return await getattr(conn, method)(query, *args)
+
+
+async def fetch_one_ro(query: str, *args) -> Optional[Dict]:
+    """Fetch a single row from the read replica (may lag the primary)"""
+    row = await _fetch_ro("fetchrow", query, *args)
+    return dict(row) if row else None
+
+
+async def fetch_all_ro(query: str, *args) -> List[Dict]:
+    """Fetch all rows from the read replica (may lag the primary)"""
+    rows = await _fetch_ro("fetch", query, *args)
+    return [dict(row) for row in rows]
+
+
+async def fetch_records_ro(query: str, *args) -> List[asyncpg.Record]:
+    """Fetch all rows from the read replica as asyncpg Records"""
+    return await _fetch_ro("fetch", query, *args)
+
+
 async def execute(query: str, *args) -> str:
     """Execute a query"""
     pool = await get_pool()
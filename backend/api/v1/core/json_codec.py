@@ -0,0 +1,46 @@
+"""
+JSON Codec - fast JSON encoding for hot paths
+Uses orjson (C implementation) when installed, stdlib json otherwise.
+
+Both backends accept datetime (ISO 8601) and Decimal (as float) values,
+so callers can pass native objects instead of pre-formatting them.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is listed in requirements
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    """Fallback encoder for types neither backend handles natively"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> str:
+    """Serialize to a JSON string (asyncpg json/jsonb parameters take str)"""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default).decode()
+    return json.dumps(value, default=_default)
+
+
+def dumps_bytes(value: Any) -> bytes:
+    """Serialize to UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default)
+    return json.dumps(value, default=_default).encode()
+
+
+def loads(data: Any) -> Any:
+    """Parse JSON from str or bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
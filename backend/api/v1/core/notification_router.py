@@ -27,6 +27,65 @@ from .database import fetch_one, fetch_all, execute, get_pool
 logger = logging.getLogger(__name__)
 
 
+# ==================== SHARED TELEGRAM CLIENT ====================
+
+# HTTP/2 needs the optional `h2` package; fall back to HTTP/1.1 without it
+try:
+    import h2  # noqa: F401
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+_telegram_client: Optional[httpx.AsyncClient] = None
+
+# Strong references to fire-and-forget emits so they are not garbage collected
+_inflight: set = set()
+
+
+def get_telegram_client() -> httpx.AsyncClient:
+    """
+    Get the process-wide Telegram HTTP client.
+    
+    All bots talk to the single api.telegram.org endpoint, so with HTTP/2
+    every concurrent send multiplexes over one TCP+TLS connection.
+    """
+    global _telegram_client
+    if _telegram_client is None or _telegram_client.is_closed:
+        if _HTTP2_AVAILABLE:
+            limits = httpx.Limits(max_connections=1, max_keepalive_connections=1, keepalive_expiry=60)
+        else:
+            limits = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60)
+        _telegram_client = httpx.AsyncClient(
+            timeout=30.0,
+            http2=_HTTP2_AVAILABLE,
+            limits=limits
+        )
+    return _telegram_client
+
+
+async def close_telegram_client(timeout: float = 5.0):
+    """
+    Close the shared Telegram HTTP client (application shutdown).
+    
+    In-flight fire-and-forget emits get up to `timeout` seconds to finish
+    and are cancelled after that, so none of them reopens the client or
+    writes notification_logs once the pool is closed. Call before
+    close_api_v1_db().
+    """
+    global _telegram_client
+    if _inflight:
+        pending = list(_inflight)
+        _, still_running = await asyncio.wait(pending, timeout=timeout)
+        if still_running:
+            logger.warning(f"Cancelling {len(still_running)} in-flight notifications on shutdown")
+            for task in still_running:
+                task.cancel()
+            await asyncio.gather(*still_running, return_exceptions=True)
+    if _telegram_client is not None:
+        await _telegram_client.aclose()
+        _telegram_client = None
+
+
 # ==================== EVENT TYPE DEFINITIONS ====================
 
 class EventType(str, Enum):
@@ -261,6 +320,44 @@ EVENT_METADATA = {
 }
 
 
+# Message formatting constants (resolved once at import)
+_CATEGORY_EMOJI = {
+    "Orders": "📦",
+    "Wallet": "💰",
+    "Games": "🎮",
+    "Withdrawals": "💸",
+    "Referrals": "👥",
+    "Transactions": "📝",
+    "System": "⚙️"
+}
+_DEFAULT_EMOJI = "📢"
+
+# Per-event header emoji; events without metadata fall back to the System emoji
+_EVENT_EMOJI = {
+    event_type: _CATEGORY_EMOJI.get(
+        EVENT_METADATA.get(event_type, {}).get("category", "System"), _DEFAULT_EMOJI
+    )
+    for event_type in EventType
+}
+
+# Static response for get_all_events(); the event table never changes at runtime
+_ALL_EVENTS = [
+    {
+        "event_type": event_type.value,
+        "label": EVENT_METADATA.get(event_type, {}).get("label", event_type.value),
+        "description": EVENT_METADATA.get(event_type, {}).get("description", ""),
+        "category": EVENT_METADATA.get(event_type, {}).get("category", "Other"),
+        "requires_approval": EVENT_METADATA.get(event_type, {}).get("requires_approval", False)
+    }
+    for event_type in EventType
+]
+
+_PREFIX_USER = "👤 *User:* "
+_PREFIX_ID = "🆔 *ID:* "
+_PREFIX_AMOUNT = "💵 *Amount:* "
+_PREFIX_REF = "📋 *Ref:* "
+
+
 # ==================== NOTIFICATION PAYLOAD ====================
 
 @dataclass
@@ -330,7 +427,8 @@ class NotificationRouter:
         Returns:
             Dict with sent_count, success_count, failed_count, details
         """
-        log_id = str(uuid.uuid4())
+        # 32-char hex form; fits the existing VARCHAR(36) log_id column
+        log_id = uuid.uuid4().hex
         event_str = event_type.value if isinstance(event_type, EventType) else event_type
         
         try:
@@ -345,52 +443,60 @@ class NotificationRouter:
             event_meta = EVENT_METADATA.get(event_type, {})
             requires_approval = event_meta.get("requires_approval", False) and payload.requires_action
             
+            def _show_buttons(bot: Dict) -> bool:
+                # For approval events, only bots with approval permission get buttons
+                if not requires_approval:
+                    return False
+                if event_type in [EventType.ORDER_CREATED, EventType.WALLET_LOAD_REQUESTED]:
+                    return bot.get('can_approve_payments') or bot.get('can_approve_wallet_loads')
+                elif event_type == EventType.WITHDRAW_REQUESTED:
+                    return bot.get('can_approve_withdrawals')
+                return False
+            
+            # Fan out to all bots concurrently over the shared client
+            results = await asyncio.gather(
+                *(
+                    NotificationRouter._send_to_bot(
+                        bot=bot,
+                        payload=payload,
+                        show_approval_buttons=_show_buttons(bot)
+                    )
+                    for bot in bots
+                ),
+                return_exceptions=True
+            )
+            
             sent_to = []
             success = []
             failed = []
             details = []
             
-            for bot in bots:
-                # For approval events, only bots with approval permission get buttons
-                show_buttons = False
-                if requires_approval:
-                    if event_type in [EventType.ORDER_CREATED, EventType.WALLET_LOAD_REQUESTED]:
-                        show_buttons = bot.get('can_approve_payments') or bot.get('can_approve_wallet_loads')
-                    elif event_type == EventType.WITHDRAW_REQUESTED:
-                        show_buttons = bot.get('can_approve_withdrawals')
-                
+            for bot, result in zip(bots, results):
                 sent_to.append(bot['bot_id'])
                 
-                try:
-                    result = await NotificationRouter._send_to_bot(
-                        bot=bot,
-                        payload=payload,
-                        show_approval_buttons=show_buttons
-                    )
-                    
-                    if result.get('success'):
-                        success.append(bot['bot_id'])
-                        details.append({
-                            "bot_id": bot['bot_id'],
-                            "bot_name": bot['name'],
-                            "success": True,
-                            "message_id": result.get('message_id')
-                        })
-                    else:
-                        failed.append(bot['bot_id'])
-                        details.append({
-                            "bot_id": bot['bot_id'],
-                            "bot_name": bot['name'],
-                            "success": False,
-                            "error": result.get('error')
-                        })
-                except Exception as e:
+                if isinstance(result, Exception):
+                    failed.append(bot['bot_id'])
+                    details.append({
+                        "bot_id": bot['bot_id'],
+                        "bot_name": bot['name'],
+                        "success": False,
+                        "error": str(result)
+                    })
+                elif result.get('success'):
+                    success.append(bot['bot_id'])
+                    details.append({
+                        "bot_id": bot['bot_id'],
+                        "bot_name": bot['name'],
+                        "success": True,
+                        "message_id": result.get('message_id')
+                    })
+                else:
                     failed.append(bot['bot_id'])
                     details.append({
                         "bot_id": bot['bot_id'],
                         "bot_name": bot['name'],
                         "success": False,
-                        "error": str(e)
+                        "error": result.get('error')
                     })
             
             # Log the notification
@@ -423,6 +529,22 @@ class NotificationRouter:
                 "error": str(e)
             }
     
+    @staticmethod
+    def emit_fire_and_forget(
+        event_type: EventType,
+        payload: NotificationPayload
+    ) -> asyncio.Task:
+        """
+        Schedule emit() in the background and return immediately.
+        
+        Use when the caller only needs the notification queued, not the
+        per-bot delivery details. Errors are logged by emit() itself.
+        """
+        task = asyncio.create_task(NotificationRouter.emit(event_type, payload, skip_logging=False))
+        _inflight.add(task)
+        task.add_done_callback(_inflight.discard)
+        return task
+    
     @staticmethod
     async def _get_subscribed_bots(event_type: str) -> List[Dict]:
         """Get all active bots subscribed to this event type"""
@@ -486,98 +608,98 @@ class NotificationRouter:
                 
                 reply_markup = {"inline_keyboard": buttons}
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                # Send text message
-                msg_data = {
-                    "chat_id": chat_id,
-                    "text": message,
-                    "parse_mode": "Markdown"
-                }
-                if reply_markup:
-                    msg_data["reply_markup"] = reply_markup
+            client = get_telegram_client()
+            # Send text message
+            msg_data = {
+                "chat_id": chat_id,
+                "text": message,
+                "parse_mode": "Markdown"
+            }
+            if reply_markup:
+                msg_data["reply_markup"] = reply_markup
+            
+            response = await client.post(
+                f"https://api.telegram.org/bot{bot_token}/sendMessage",
+                json=msg_data
+            )
+            
+            if response.status_code == 200:
+                result = response.json()
+                message_id = result.get('result', {}).get('message_id')
                 
-                response = await client.post(
-                    f"https://api.telegram.org/bot{bot_token}/sendMessage",
-                    json=msg_data
-                )
+                # Handle proof images - check both extra_data and payload.image_url
+                proof_image_sent = False
                 
-                if response.status_code == 200:
-                    result = response.json()
-                    message_id = result.get('result', {}).get('message_id')
-                    
-                    # Handle proof images - check both extra_data and payload.image_url
-                    proof_image_sent = False
-                    
-                    # Check for base64 proof_image in extra_data (SITE UPLOADS)
-                    extra_data = payload.extra_data or {}
-                    base64_proof = extra_data.get('proof_image')
-                    
-                    if base64_proof:
-                        try:
-                            # Remove data URL prefix if present
-                            if ',' in base64_proof:
-                                base64_proof = base64_proof.split(',', 1)[1]
-                            
-                            # Decode base64 to bytes
-                            image_bytes = base64.b64decode(base64_proof)
-                            
-                            # Determine file extension from image_type if available
-                            image_type = extra_data.get('image_type', 'image/jpeg')
-                            ext = 'jpg'
-                            if 'png' in image_type:
-                                ext = 'png'
-                            elif 'gif' in image_type:
-                                ext = 'gif'
-                            
-                            # Create filename
-                            ref_short = payload.reference_id[:8] if payload.reference_id else 'proof'
-                            filename = f"payment_proof_{ref_short}.{ext}"
+                # Check for base64 proof_image in extra_data (SITE UPLOADS)
+                extra_data = payload.extra_data or {}
+                base64_proof = extra_data.get('proof_image')
+                
+                if base64_proof:
+                    try:
+                        # Remove data URL prefix if present
+                        if ',' in base64_proof:
+                            base64_proof = base64_proof.split(',', 1)[1]
+                        
+                        # Decode base64 to bytes
+                        image_bytes = base64.b64decode(base64_proof)
+                        
+                        # Determine file extension from image_type if available
+                        image_type = extra_data.get('image_type', 'image/jpeg')
+                        ext = 'jpg'
+                        if 'png' in image_type:
+                            ext = 'png'
+                        elif 'gif' in image_type:
+                            ext = 'gif'
+                        
+                        # Create filename
+                        ref_short = payload.reference_id[:8] if payload.reference_id else 'proof'
+                        filename = f"payment_proof_{ref_short}.{ext}"
+                        
+                        # Send as document (file upload) - more reliable for large images
+                        files = {
+                            'document': (filename, io.BytesIO(image_bytes), image_type)
+                        }
+                        form_data = {
+                            'chat_id': chat_id,
+                            'caption': f"📎 Payment Proof for {payload.reference_type or 'request'} {ref_short}..."
+                        }
+                        
+                        img_response = await client.post(
+                            f"https://api.telegram.org/bot{bot_token}/sendDocument",
+                            data=form_data,
+                            files=files
+                        )
+                        
+                        if img_response.status_code == 200:
+                            proof_image_sent = True
+                            logger.info(f"Base64 proof image sent to bot {bot['name']} for {payload.reference_id}")
+                        else:
+                            logger.warning(f"Failed to send base64 proof image: {img_response.text}")
                             
-                            # Send as document (file upload) - more reliable for large images
-                            files = {
-                                'document': (filename, io.BytesIO(image_bytes), image_type)
-                            }
-                            form_data = {
-                                'chat_id': chat_id,
-                                'caption': f"📎 Payment Proof for {payload.reference_type or 'request'} {ref_short}..."
+                    except Exception as img_err:
+                        logger.warning(f"Failed to decode/send base64 proof image to bot {bot['name']}: {img_err}")
+                
+                # Check for image_url in extra_data (CHATWOOT/WEBHOOK UPLOADS)
+                image_url = extra_data.get('image_url') or payload.image_url
+                if image_url and not proof_image_sent:
+                    try:
+                        await client.post(
+                            f"https://api.telegram.org/bot{bot_token}/sendPhoto",
+                            json={
+                                "chat_id": chat_id,
+                                "photo": image_url,
+                                "caption": f"📎 Proof for {payload.reference_type or 'request'} {payload.reference_id[:8] if payload.reference_id else 'N/A'}..."
                             }
-                            
-                            img_response = await client.post(
-                                f"https://api.telegram.org/bot{bot_token}/sendDocument",
-                                data=form_data,
-                                files=files
-                            )
-                            
-                            if img_response.status_code == 200:
-                                proof_image_sent = True
-                                logger.info(f"Base64 proof image sent to bot {bot['name']} for {payload.reference_id}")
-                            else:
-                                logger.warning(f"Failed to send base64 proof image: {img_response.text}")
-                                
-                        except Exception as img_err:
-                            logger.warning(f"Failed to decode/send base64 proof image to bot {bot['name']}: {img_err}")
-                    
-                    # Check for image_url in extra_data (CHATWOOT/WEBHOOK UPLOADS)
-                    image_url = extra_data.get('image_url') or payload.image_url
-                    if image_url and not proof_image_sent:
-                        try:
-                            await client.post(
-                                f"https://api.telegram.org/bot{bot_token}/sendPhoto",
-                                json={
-                                    "chat_id": chat_id,
-                                    "photo": image_url,
-                                    "caption": f"📎 Proof for {payload.reference_type or 'request'} {payload.reference_id[:8] if payload.reference_id else 'N/A'}..."
-                                }
-                            )
-                            proof_image_sent = True
-                            logger.info(f"URL proof image sent to bot {bot['name']} for {payload.reference_id}")
-                        except Exception as img_err:
-                            logger.warning(f"Failed to send URL image to bot {bot['name']}: {img_err}")
-                    
-                    return {"success": True, "message_id": message_id, "proof_image_sent": proof_image_sent}
-                else:
-                    return {"success": False, "error": response.text}
-                    
+                        )
+                        proof_image_sent = True
+                        logger.info(f"URL proof image sent to bot {bot['name']} for {payload.reference_id}")
+                    except Exception as img_err:
+                        logger.warning(f"Failed to send URL image to bot {bot['name']}: {img_err}")
+                
+                return {"success": True, "message_id": message_id, "proof_image_sent": proof_image_sent}
+            else:
+                return {"success": False, "error": response.text}
+                
         except Exception as e:
             logger.error(f"Failed to send to bot {bot.get('name')}: {e}")
             return {"success": False, "error": str(e)}
@@ -585,20 +707,7 @@ class NotificationRouter:
     @staticmethod
     def _format_message(payload: NotificationPayload) -> str:
         """Format notification payload into Telegram message"""
-        event_meta = EVENT_METADATA.get(payload.event_type, {})
-        category = event_meta.get("category", "System")
-        
-        # Emoji mapping
-        emoji_map = {
-            "Orders": "📦",
-            "Wallet": "💰",
-            "Games": "🎮",
-            "Withdrawals": "💸",
-            "Referrals": "👥",
-            "Transactions": "📝",
-            "System": "⚙️"
-        }
-        emoji = emoji_map.get(category, "📢")
+        emoji = _EVENT_EMOJI.get(payload.event_type, _CATEGORY_EMOJI["System"])
         
         lines = [
             f"{emoji} *{payload.title}*",
@@ -606,16 +715,16 @@ class NotificationRouter:
         ]
         
         if payload.username:
-            lines.append(f"👤 *User:* {payload.display_name or payload.username} (@{payload.username})")
+            lines.append(f"{_PREFIX_USER}{payload.display_name or payload.username} (@{payload.username})")
         
         if payload.user_id:
-            lines.append(f"🆔 *ID:* `{payload.user_id[:8]}...`")
+            lines.append(f"{_PREFIX_ID}`{payload.user_id[:8]}...`")
         
         if payload.amount is not None:
-            lines.append(f"💵 *Amount:* ₱{payload.amount:,.2f}")
+            lines.append(f"{_PREFIX_AMOUNT}₱{payload.amount:,.2f}")
         
         if payload.reference_id:
-            lines.append(f"📋 *Ref:* `{payload.reference_id[:8]}...`")
+            lines.append(f"{_PREFIX_REF}`{payload.reference_id[:8]}...`")
         
         lines.append("")
         lines.append(payload.message)
@@ -668,17 +777,7 @@ class NotificationRouter:
     @staticmethod
     async def get_all_events() -> List[Dict]:
         """Get all available event types with metadata"""
-        events = []
-        for event_type in EventType:
-            meta = EVENT_METADATA.get(event_type, {})
-            events.append({
-                "event_type": event_type.value,
-                "label": meta.get("label", event_type.value),
-                "description": meta.get("description", ""),
-                "category": meta.get("category", "Other"),
-                "requires_approval": meta.get("requires_approval", False)
-            })
-        return events
+        return list(_ALL_EVENTS)
     
     @staticmethod
     async def verify_bot_approval_permission(bot_id: str, event_type: str) -> bool:
@@ -719,7 +818,8 @@ async def emit_event(
     image_url: str = None,
     requires_action: bool = False,
     entity_type: str = None,  # STANDARDIZED: action:entity_type:entity_id
-    action_prefix: str = None  # DEPRECATED: kept for backwards compatibility
+    action_prefix: str = None,  # DEPRECATED: kept for backwards compatibility
+    wait: bool = False
 ) -> Dict[str, Any]:
     """
     Convenience function to emit an event
@@ -742,6 +842,10 @@ async def emit_event(
     
     Callback format: action:entity_type:entity_id
     Examples: approve:wallet_load:abc123, reject:order:def456
+    
+    By default the event is delivered in the background and {"queued": True}
+    is returned. Pass wait=True to block until all bots have been notified
+    and receive the full emit() result.
     """
     # Use entity_type if provided, fall back to reference_type, then action_prefix for backwards compat
     effective_entity_type = entity_type or reference_type or action_prefix or "item"
@@ -765,4 +869,8 @@ async def emit_event(
         } if requires_action else None
     )
     
+    if not wait:
+        NotificationRouter.emit_fire_and_forget(event_type, payload)
+        return {"queued": True}
+    
     return await NotificationRouter.emit(event_type, payload)
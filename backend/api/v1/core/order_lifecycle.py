@@ -36,16 +36,21 @@ B) DIRECT EXECUTION (NO APPROVAL):
    
 Terminal States: completed, failed, rejected, cancelled
 """
+import asyncio
+import functools
 import logging
+import sys
 import uuid
-import json
 from enum import Enum
-from typing import Optional, Dict, Any, Tuple, Set, Literal
+from typing import Optional, Dict, Any, Tuple, List, Set, FrozenSet, Literal
 from datetime import datetime, timezone
 from dataclasses import dataclass
 from decimal import Decimal
 
-from .database import fetch_one, execute, get_pool
+import asyncpg
+
+from .database import execute, get_pool
+from . import json_codec
 from .structured_logging import get_correlation_id
 
 logger = logging.getLogger(__name__)
@@ -72,44 +77,85 @@ class OrderStatus(str, Enum):
     CANCELLED = "cancelled"                 # Cancelled by user
     
     @classmethod
-    def terminal_states(cls) -> Set[str]:
+    def terminal_states(cls) -> FrozenSet[str]:
         """States that cannot be changed"""
-        return {cls.COMPLETED.value, cls.FAILED.value, cls.REJECTED.value, cls.CANCELLED.value}
+        return _TERMINAL_STATES
     
     @classmethod
     def is_terminal(cls, status: str) -> bool:
         """Check if a status is terminal"""
-        return status in cls.terminal_states()
+        return bool(_STATUS_BITS.get(status, 0) & _TERMINAL_MASK)
     
     @classmethod
-    def pending_variants(cls) -> Set[str]:
+    def pending_variants(cls) -> FrozenSet[str]:
         """All variants that mean 'pending' (includes legacy)"""
-        return {
-            cls.PENDING_APPROVAL.value,
-            "pending_review", "PENDING_REVIEW",
-            "pending", "initiated",
-            "awaiting_payment_proof"
-        }
+        return _PENDING_VARIANTS
     
     @classmethod
-    def approved_variants(cls) -> Set[str]:
+    def approved_variants(cls) -> FrozenSet[str]:
         """All variants that mean 'approved' (includes legacy)"""
-        return {
-            cls.APPROVED.value,
-            "APPROVED_EXECUTED", "confirmed"
-        }
+        return _APPROVED_VARIANTS
     
     @classmethod
     def normalize(cls, status: str) -> str:
         """Normalize legacy status to canonical form"""
-        if status in cls.pending_variants():
+        # Fast path: most callers already pass a canonical value
+        if status in _CANONICAL_STATUSES:
+            return status
+        bits = _STATUS_BITS.get(status, 0)
+        if bits & _PENDING_MASK:
             return cls.PENDING_APPROVAL.value
-        if status in cls.approved_variants():
+        if bits & _APPROVED_MASK:
             return cls.APPROVED.value
-        # Return as-is if already canonical or unknown
+        # Return as-is if unknown
         return status
 
 
+# Status classification sets (built once; OrderStatus classmethods return these)
+_CANONICAL_STATUSES: FrozenSet[str] = frozenset(s.value for s in OrderStatus)
+
+_TERMINAL_STATES: FrozenSet[str] = frozenset({
+    OrderStatus.COMPLETED.value,
+    OrderStatus.FAILED.value,
+    OrderStatus.REJECTED.value,
+    OrderStatus.CANCELLED.value,
+})
+
+_PENDING_VARIANTS: FrozenSet[str] = frozenset({
+    OrderStatus.PENDING_APPROVAL.value,
+    "pending_review", "PENDING_REVIEW",
+    "pending", "initiated",
+    "awaiting_payment_proof",
+})
+
+_APPROVED_VARIANTS: FrozenSet[str] = frozenset({
+    OrderStatus.APPROVED.value,
+    "APPROVED_EXECUTED", "confirmed",
+})
+
+# One bit per known status string (canonical + legacy), so classification
+# and transition checks reduce to a dict lookup and a bitwise AND
+_STATUS_BITS: Dict[str, int] = {
+    status: 1 << bit
+    for bit, status in enumerate(sorted(
+        {s.value for s in OrderStatus} | _PENDING_VARIANTS | _APPROVED_VARIANTS
+    ))
+}
+
+
+def _mask_of(statuses) -> int:
+    """OR together the bits of the given statuses"""
+    mask = 0
+    for status in statuses:
+        mask |= _STATUS_BITS[status]
+    return mask
+
+
+_TERMINAL_MASK = _mask_of(_TERMINAL_STATES)
+_PENDING_MASK = _mask_of(_PENDING_VARIANTS)
+_APPROVED_MASK = _mask_of(_APPROVED_VARIANTS)
+
+
 # ==================== CANONICAL ORDER TYPES ====================
 
 class OrderType(str, Enum):
@@ -199,27 +245,54 @@ LEGACY_TRANSITIONS: Dict[str, Set[str]] = {
 }
 
 
+# Flattened lookup tables derived from the two maps above (built once at import)
+_ALLOWED_BY_FROM: Dict[str, FrozenSet[str]] = {
+    from_status: frozenset(
+        ALLOWED_TRANSITIONS.get(OrderStatus.normalize(from_status), set())
+        | LEGACY_TRANSITIONS.get(from_status, set())
+    )
+    for from_status in _STATUS_BITS
+}
+
+# from_status -> bitmask of valid to_statuses
+_TRANSITION_MASK: Dict[str, int] = {
+    from_status: _mask_of(to_statuses)
+    for from_status, to_statuses in _ALLOWED_BY_FROM.items()
+}
+
+_NO_TRANSITIONS: FrozenSet[str] = frozenset()
+
+# to_status -> sorted list of from_statuses that may reach it (inverse map)
+_VALID_FROM_FOR_TO: Dict[str, list] = {
+    to_status: sorted(
+        from_status for from_status, to_statuses in _ALLOWED_BY_FROM.items()
+        if to_status in to_statuses
+    )
+    for to_status in _STATUS_BITS
+}
+
+@functools.lru_cache(maxsize=128)
+def _valid_from_for_expected(to_status: str, expected: str) -> list:
+    """
+    Subset of _VALID_FROM_FOR_TO[to_status] that normalizes to `expected`.
+    
+    Only transitions with expected_from_status need this, so it is built
+    per (to_status, expected) pair on first use instead of at import.
+    """
+    return [
+        from_status for from_status in _VALID_FROM_FOR_TO.get(to_status, [])
+        if OrderStatus.normalize(from_status) == expected
+    ]
+
+
 def is_valid_transition(from_status: str, to_status: str) -> bool:
     """Check if a status transition is valid according to the state machine"""
-    # Normalize legacy statuses
-    normalized_from = OrderStatus.normalize(from_status)
-    
-    # Check main transitions
-    allowed = ALLOWED_TRANSITIONS.get(normalized_from, set())
-    if to_status in allowed:
-        return True
-    
-    # Check legacy transitions
-    allowed_legacy = LEGACY_TRANSITIONS.get(from_status, set())
-    return to_status in allowed_legacy
+    return bool(_TRANSITION_MASK.get(from_status, 0) & _STATUS_BITS.get(to_status, 0))
 
 
-def get_allowed_transitions(from_status: str) -> Set[str]:
+def get_allowed_transitions(from_status: str) -> FrozenSet[str]:
     """Get the set of valid target statuses from a given status"""
-    normalized = OrderStatus.normalize(from_status)
-    base = ALLOWED_TRANSITIONS.get(normalized, set())
-    legacy = LEGACY_TRANSITIONS.get(from_status, set())
-    return base | legacy
+    return _ALLOWED_BY_FROM.get(from_status, _NO_TRANSITIONS)
 
 
 # ==================== ERROR CODES ====================
@@ -240,7 +313,7 @@ class OrderErrorCode(str, Enum):
 
 # ==================== TRANSITION RESULT ====================
 
-@dataclass
+@dataclass(slots=True)
 class TransitionResult:
     """Result of a state transition attempt"""
     success: bool
@@ -268,10 +341,17 @@ class TransitionResult:
 # CANONICAL TABLE: audit_logs (used by UI timelines and portal)
 # This is the SINGLE SOURCE OF TRUTH for all order auditing.
 
+def _now_utc() -> datetime:
+    """Current UTC time; compute once per operation and thread it through"""
+    return datetime.now(timezone.utc)
+
+
 def _safe_float(value: Any, default: float = 0.0) -> float:
     """
     Safely convert a value to float.
     Handles None, Decimal, str, and other types.
+    
+    Use for caller-supplied values; DB numeric columns can be converted directly.
     """
     if value is None:
         return default
@@ -283,6 +363,40 @@ def _safe_float(value: Any, default: float = 0.0) -> float:
         return default
 
 
+# Canonical actor_type strings; values arriving from request bodies or
+# other enums are mapped onto these shared objects (literals in this
+# module are already interned by the compiler)
+_ACTOR_TYPES: Dict[str, str] = {
+    actor_type: sys.intern(actor_type)
+    for actor_type in ("admin", "system", "telegram_bot", "user")
+}
+
+
+def _build_audit_details(
+    order_id: str,
+    from_status: Optional[str],
+    to_status: str,
+    actor_id: str,
+    actor_type: str,
+    amount: Optional[float] = None,
+    details: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Build the details JSON stored with every order audit row"""
+    audit_details = {
+        "order_id": order_id,
+        "from_status": from_status,
+        "to_status": to_status,
+        "actor_id": actor_id,
+        "actor_type": _ACTOR_TYPES.get(actor_type, actor_type),
+        "correlation_id": get_correlation_id(),
+    }
+    if amount is not None:
+        audit_details["amount"] = _safe_float(amount)
+    if details:
+        audit_details.update(details)
+    return audit_details
+
+
 async def write_order_audit(
     conn,
     order_id: str,
@@ -294,34 +408,30 @@ async def write_order_audit(
     actor_id: str,
     actor_type: str,
     amount: Optional[float] = None,
-    details: Optional[Dict[str, Any]] = None
+    details: Optional[Dict[str, Any]] = None,
+    now: Optional[datetime] = None
 ) -> str:
     """
     Write to the CANONICAL audit_logs table.
     
     This is the SINGLE SOURCE OF TRUTH for order auditing.
-    All transitions and creations MUST use this function.
+    transition_order and create_order write their audit rows in the same
+    statement as the order change; use this for any other order audit.
+    
+    Pass `now` to reuse the caller's timestamp so the audit row matches
+    the order row it describes.
     
     Returns:
         audit_log_id
     """
     audit_log_id = str(uuid.uuid4())
-    correlation_id = get_correlation_id()
-    now = datetime.now(timezone.utc)
+    if now is None:
+        now = _now_utc()
     
     # Build detailed audit record
-    audit_details = {
-        "order_id": order_id,
-        "from_status": from_status,
-        "to_status": to_status,
-        "actor_id": actor_id,
-        "actor_type": actor_type,
-        "correlation_id": correlation_id,
-    }
-    if amount is not None:
-        audit_details["amount"] = _safe_float(amount)
-    if details:
-        audit_details.update(details)
+    audit_details = _build_audit_details(
+        order_id, from_status, to_status, actor_id, actor_type, amount, details
+    )
     
     # Write to canonical audit_logs table
     await conn.execute("""
@@ -330,15 +440,372 @@ async def write_order_audit(
             resource_type, resource_id, details, created_at
         ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
     """, audit_log_id, user_id, username, action,
-         "order", order_id, json.dumps(audit_details), now)
+         "order", order_id, json_codec.dumps(audit_details), now)
     
     logger.debug(f"Audit log written: {action} for order {order_id}")
     
     return audit_log_id
 
 
+# ==================== QUEUED AUDIT WRITES ====================
+# For audit rows that need not commit with the caller's change: rows are
+# queued and inserted in batches by a background task started at app
+# startup. transition_order/create_order keep writing their audit rows in
+# the same statement as the order change.
+
+_AUDIT_QUEUE_MAX = 10000
+_AUDIT_BATCH_SIZE = 200
+_AUDIT_FLUSH_INTERVAL = 0.05  # seconds to wait for a batch to fill
+
+_AUDIT_COPY_COLUMNS = (
+    "log_id", "user_id", "username", "action",
+    "resource_type", "resource_id", "details", "created_at",
+)
+
+_audit_queue: Optional[asyncio.Queue] = None
+_audit_flusher_task: Optional[asyncio.Task] = None
+
+
+_SQL_INSERT_QUEUED_AUDIT = """
+    INSERT INTO audit_logs (
+        log_id, user_id, username, action, resource_type, resource_id, details, created_at
+    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+"""
+
+
+async def _copy_audit_records(records: List[tuple]) -> None:
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        await conn.copy_records_to_table(
+            "audit_logs", records=records, columns=_AUDIT_COPY_COLUMNS
+        )
+
+
+async def _flush_audit_rows(rows: List[tuple]) -> None:
+    """
+    COPY a batch of queued audit rows into audit_logs; failures are
+    logged, not raised. Details are JSON-encoded here, off the caller's
+    path.
+    
+    A failed COPY is retried once; if it fails again the rows are inserted
+    one at a time so a single bad row only loses itself. Rows that still
+    fail are logged by log_id.
+    """
+    records = [
+        (log_id, user_id, username, action, resource_type, resource_id,
+         json_codec.dumps(details) if details is not None else None, created_at)
+        for log_id, user_id, username, action, resource_type, resource_id, details, created_at in rows
+    ]
+    for attempt in (1, 2):
+        try:
+            await _copy_audit_records(records)
+            return
+        except Exception as e:
+            logger.warning(f"COPY of {len(records)} queued audit rows failed (attempt {attempt}): {e}")
+    
+    dropped = []
+    for record in records:
+        try:
+            await execute(_SQL_INSERT_QUEUED_AUDIT, *record)
+        except Exception as e:
+            dropped.append(record[0])
+            logger.error(f"Dropped queued audit row {record[0]}: {e}")
+    if dropped:
+        logger.error(f"Dropped {len(dropped)} of {len(records)} queued audit rows: {', '.join(dropped)}")
+
+
+async def _audit_flusher(queue: asyncio.Queue) -> None:
+    """Drain the audit queue in batches of up to _AUDIT_BATCH_SIZE"""
+    loop = asyncio.get_running_loop()
+    while True:
+        rows = [await queue.get()]
+        deadline = loop.time() + _AUDIT_FLUSH_INTERVAL
+        while len(rows) < _AUDIT_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                rows.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        try:
+            await _flush_audit_rows(rows)
+        finally:
+            for _ in rows:
+                queue.task_done()
+
+
+def start_audit_flusher() -> None:
+    """Start the background audit writer (call once from app startup)"""
+    global _audit_queue, _audit_flusher_task
+    if _audit_flusher_task is not None:
+        return
+    _audit_queue = asyncio.Queue(maxsize=_AUDIT_QUEUE_MAX)
+    _audit_flusher_task = asyncio.create_task(_audit_flusher(_audit_queue))
+
+
+async def stop_audit_flusher(timeout: float = 5.0) -> None:
+    """Flush pending audit rows and stop the background writer"""
+    global _audit_queue, _audit_flusher_task
+    if _audit_flusher_task is None:
+        return
+    try:
+        await asyncio.wait_for(_audit_queue.join(), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"Dropping {_audit_queue.qsize()} queued audit rows on shutdown")
+    _audit_flusher_task.cancel()
+    try:
+        await _audit_flusher_task
+    except asyncio.CancelledError:
+        pass
+    _audit_queue = None
+    _audit_flusher_task = None
+
+
+async def enqueue_audit_row(
+    log_id: str,
+    user_id: Optional[str],
+    username: Optional[str],
+    action: str,
+    resource_id: str,
+    details: Optional[Dict[str, Any]],
+    created_at: datetime,
+    resource_type: str = "order"
+) -> None:
+    """
+    Queue a prebuilt audit_logs row (resource_type 'order' by default).
+    
+    Low-level entry point for callers that build their own details
+    (None is stored as SQL NULL); falls back to a direct write if the
+    flusher is not running or its queue is full.
+    """
+    row = (log_id, user_id, username, action, resource_type, resource_id, details, created_at)
+    if _audit_queue is not None:
+        try:
+            _audit_queue.put_nowait(row)
+            return
+        except asyncio.QueueFull:
+            pass
+    await _flush_audit_rows([row])
+
+
 # ==================== CORE TRANSITION FUNCTION ====================
 
+# Hot-path SQL kept as module constants: asyncpg caches prepared statements
+# per connection keyed by query text, so these are parsed and planned once
+# per pooled connection and reused by every transition.
+
+# Conditional-atomic transition: locks the row only if its current status is
+# a valid source for the target ($7) and its order_type is not excluded ($8),
+# updates it, and writes the audit row. Transition history lives in
+# audit_logs only; orders.metadata is touched just when the caller supplies
+# a patch ($9, merged server-side).
+_SQL_TRANSITION_TEMPLATE = """
+    WITH cur AS (
+        SELECT order_id, status
+        FROM orders
+        WHERE order_id = $3
+          AND status = ANY($7::text[])
+          AND (order_type IS NULL OR order_type <> ALL($8::text[]))
+        FOR UPDATE
+    ),
+    upd AS (
+        UPDATE orders o
+        SET status = $1,{metadata_clause}
+            updated_at = $2
+        FROM cur
+        WHERE o.order_id = cur.order_id
+        RETURNING o.order_id, o.user_id, o.username, o.amount, cur.status AS from_status
+    ),
+    ins AS (
+        INSERT INTO audit_logs (
+            log_id, user_id, username, action,
+            resource_type, resource_id, details, created_at
+        )
+        SELECT $4, user_id, username, $5, 'order', order_id,
+               $6::jsonb || jsonb_build_object(
+                   'from_status', from_status,
+                   'amount', COALESCE(amount, 0)::float8
+               ),
+               $2
+        FROM upd
+        RETURNING log_id
+    )
+    SELECT upd.from_status, ins.log_id FROM upd, ins
+"""
+
+_SQL_TRANSITION = _SQL_TRANSITION_TEMPLATE.format(metadata_clause="")
+_SQL_TRANSITION_WITH_METADATA = _SQL_TRANSITION_TEMPLATE.format(
+    metadata_clause="\n            metadata = COALESCE(o.metadata, '{}'::jsonb) || $9::jsonb,"
+)
+# Approval with an adjusted amount ($10, by $11): the original amount comes
+# from the locked row, and the adjustment is only recorded if it differs
+_SQL_TRANSITION_WITH_ADJUSTMENT = _SQL_TRANSITION_TEMPLATE.format(
+    metadata_clause="""
+            metadata = COALESCE(o.metadata, '{}'::jsonb) || $9::jsonb
+                || CASE WHEN COALESCE(o.amount, 0) <> $10::float8 THEN jsonb_build_object(
+                    'amount_adjusted', true,
+                    'original_amount', COALESCE(o.amount, 0),
+                    'adjusted_amount', $10::float8,
+                    'adjusted_by', $11::text
+                ) ELSE '{}'::jsonb END,"""
+)
+
+# Bulk variant: one conditional UPDATE for many orders; $4 carries a
+# pre-generated audit log_id per order_id in $3
+_SQL_BULK_TRANSITION = """
+    WITH cur AS (
+        SELECT o.order_id, o.status, ids.log_id
+        FROM orders o
+        JOIN unnest($3::text[], $4::text[]) AS ids(order_id, log_id)
+          ON o.order_id = ids.order_id
+        WHERE o.status = ANY($6::text[])
+        FOR UPDATE OF o
+    ),
+    upd AS (
+        UPDATE orders o
+        SET status = $1,
+            updated_at = $2
+        FROM cur
+        WHERE o.order_id = cur.order_id
+        RETURNING o.order_id, o.user_id, o.username, o.amount,
+                  cur.status AS from_status, cur.log_id
+    ),
+    ins AS (
+        INSERT INTO audit_logs (
+            log_id, user_id, username, action,
+            resource_type, resource_id, details, created_at
+        )
+        SELECT log_id, user_id, username, $5, 'order', order_id,
+               $7::jsonb || jsonb_build_object(
+                   'order_id', order_id,
+                   'from_status', from_status,
+                   'amount', COALESCE(amount, 0)::float8
+               ),
+               $2
+        FROM upd
+        RETURNING log_id
+    )
+    SELECT upd.order_id, upd.from_status, ins.log_id
+    FROM upd JOIN ins ON ins.log_id = upd.log_id
+"""
+
+_SQL_ORDERS_STATUS = """
+    SELECT order_id, status, order_type FROM orders WHERE order_id = ANY($1::text[])
+"""
+
+# Audit action names, interned once instead of formatted per call
+_ACTION_BY_STATUS: Dict[str, str] = {
+    status: sys.intern(f"order.transition.{status}") for status in _STATUS_BITS
+}
+_CREATED_ACTION = sys.intern("order.created")
+
+# Used only when the conditional UPDATE matched nothing, to explain why
+_SQL_ORDER_STATUS = """
+    SELECT status, order_type FROM orders WHERE order_id = $1
+"""
+
+_DIRECT_EXECUTION_TYPES_LIST = sorted(DIRECT_EXECUTION_TYPES)
+
+
+def _classify_failed_transition(
+    order_id: str,
+    to_status: str,
+    order: Optional[Dict[str, Any]],
+    expected_from_status: Optional[str] = None,
+    require_approvable: bool = False,
+    normalized_expected: Optional[str] = None
+) -> TransitionResult:
+    """
+    Explain why a conditional transition UPDATE matched no row.
+    
+    `order` is the current (status, order_type) row, or None if missing.
+    Pass `normalized_expected` if the caller already normalized
+    expected_from_status.
+    """
+    if not order:
+        return TransitionResult(
+            success=False,
+            order_id=order_id,
+            from_status="",
+            to_status=to_status,
+            message="Order not found",
+            error_code=OrderErrorCode.ORDER_NOT_FOUND.value
+        )
+    
+    current_status = order['status']
+    
+    # Direct-execution orders never go through approval
+    if require_approvable and is_direct_execution(order['order_type']):
+        return TransitionResult(
+            success=False,
+            order_id=order_id,
+            from_status=current_status,
+            to_status=to_status,
+            message=f"Order type '{order['order_type']}' does not require approval",
+            error_code=OrderErrorCode.NOT_APPROVABLE.value
+        )
+    
+    # IDEMPOTENCY: Already in target status = no-op success
+    if current_status == to_status:
+        logger.info(f"Order {order_id} already in status {to_status} (no-op)")
+        return TransitionResult(
+            success=True,
+            order_id=order_id,
+            from_status=current_status,
+            to_status=to_status,
+            message=f"Order already in '{to_status}' status",
+            is_noop=True
+        )
+    
+    # Check expected status if provided
+    if expected_from_status is not None:
+        if normalized_expected is None:
+            normalized_expected = OrderStatus.normalize(expected_from_status)
+        if OrderStatus.normalize(current_status) != normalized_expected:
+            return TransitionResult(
+                success=False,
+                order_id=order_id,
+                from_status=current_status,
+                to_status=to_status,
+                message=f"Order status mismatch: expected '{expected_from_status}', found '{current_status}'",
+                error_code=OrderErrorCode.CONCURRENT_MODIFICATION.value
+            )
+    
+    # TERMINAL STATE CHECK: Cannot transition out of terminal states
+    if OrderStatus.is_terminal(current_status):
+        return TransitionResult(
+            success=False,
+            order_id=order_id,
+            from_status=current_status,
+            to_status=to_status,
+            message=f"Cannot transition from terminal state '{current_status}'",
+            error_code=OrderErrorCode.ALREADY_PROCESSED.value
+        )
+    
+    # VALIDATE TRANSITION
+    if not is_valid_transition(current_status, to_status):
+        allowed = get_allowed_transitions(current_status)
+        return TransitionResult(
+            success=False,
+            order_id=order_id,
+            from_status=current_status,
+            to_status=to_status,
+            message=f"Invalid transition: '{current_status}' -> '{to_status}'. Allowed: {set(allowed)}",
+            error_code=OrderErrorCode.INVALID_TRANSITION.value
+        )
+    
+    # Status became valid after our UPDATE was evaluated (concurrent change)
+    return TransitionResult(
+        success=False,
+        order_id=order_id,
+        from_status=current_status,
+        to_status=to_status,
+        message=f"Order status changed concurrently (now '{current_status}')",
+        error_code=OrderErrorCode.CONCURRENT_MODIFICATION.value
+    )
+
+
 async def transition_order(
     order_id: str,
     to_status: str,
@@ -347,18 +814,22 @@ async def transition_order(
     reason: Optional[str] = None,
     metadata_patch: Optional[Dict[str, Any]] = None,
     expected_from_status: Optional[str] = None,
-    conn=None
+    conn=None,
+    now: Optional[datetime] = None,
+    require_approvable: bool = False,
+    final_amount: Optional[float] = None
 ) -> TransitionResult:
     """
     THE ONLY WAY TO CHANGE ORDER STATUS.
     
     This function:
-    1. Acquires a row lock (SELECT FOR UPDATE)
-    2. Validates current status matches expected (if provided)
-    3. Validates the transition is allowed by state machine
-    4. Updates the order status atomically
-    5. Creates an audit log entry
-    6. Returns detailed result
+    1. Atomically locks and updates the order only if its current status
+       is a valid source for to_status (and matches expected, if provided)
+    2. Merges metadata_patch (if any) and creates the audit log entry in the
+       same statement; the audit log is the transition history
+    3. If nothing was updated, re-reads the status to report why
+       (not found / no-op / mismatch / terminal / invalid transition)
+    4. Returns detailed result
     
     Args:
         order_id: The order to transition
@@ -369,6 +840,11 @@ async def transition_order(
         metadata_patch: Optional metadata to merge into order
         expected_from_status: If provided, fail if current status doesn't match
         conn: Optional database connection (for transaction reuse)
+        now: Optional timestamp shared with the caller's metadata_patch
+        require_approvable: Fail with NOT_APPROVABLE for direct-execution
+            order types (checked against the locked row)
+        final_amount: Approval amount; if it differs from the locked row's
+            amount, the adjustment is recorded in metadata
     
     Returns:
         TransitionResult with success status and details
@@ -377,7 +853,8 @@ async def transition_order(
         - If already in to_status, returns success with is_noop=True
         - If in different terminal state, returns failure with 409 conflict
     """
-    correlation_id = get_correlation_id()
+    if now is None:
+        now = _now_utc()
     
     # Use provided connection or get new one
     pool = await get_pool()
@@ -386,127 +863,43 @@ async def transition_order(
     if conn is None:
         conn = await pool.acquire()
     
+    # Source statuses from which to_status is reachable
+    if expected_from_status is None:
+        normalized_expected = None
+        valid_from = _VALID_FROM_FOR_TO.get(to_status, [])
+    else:
+        normalized_expected = OrderStatus.normalize(expected_from_status)
+        valid_from = _valid_from_for_expected(to_status, normalized_expected)
+    
+    # from_status and amount are overwritten from the locked row in SQL
+    audit_details = _build_audit_details(
+        order_id, None, to_status, actor_id, actor_type,
+        None, {"reason": reason}
+    )
+    
+    args = [
+        to_status, now, order_id,
+        str(uuid.uuid4()),
+        _ACTION_BY_STATUS.get(to_status) or f"order.transition.{to_status}",
+        json_codec.dumps(audit_details), valid_from,
+        _DIRECT_EXECUTION_TYPES_LIST if require_approvable else []
+    ]
+    if final_amount is not None:
+        sql = _SQL_TRANSITION_WITH_ADJUSTMENT
+        args += [json_codec.dumps(metadata_patch or {}), float(final_amount), actor_id]
+    elif metadata_patch:
+        sql = _SQL_TRANSITION_WITH_METADATA
+        args.append(json_codec.dumps(metadata_patch))
+    else:
+        sql = _SQL_TRANSITION
+    
     try:
-        # Start transaction
-        async with conn.transaction():
-            # Lock the order row - INCLUDE amount for audit logging!
-            order = await conn.fetchrow("""
-                SELECT order_id, status, order_type, user_id, username, metadata, amount
-                FROM orders 
-                WHERE order_id = $1 
-                FOR UPDATE
-            """, order_id)
-            
-            if not order:
-                return TransitionResult(
-                    success=False,
-                    order_id=order_id,
-                    from_status="",
-                    to_status=to_status,
-                    message="Order not found",
-                    error_code=OrderErrorCode.ORDER_NOT_FOUND.value
-                )
-            
-            current_status = order['status']
-            
-            # IDEMPOTENCY: Already in target status = no-op success
-            if current_status == to_status:
-                logger.info(f"Order {order_id} already in status {to_status} (no-op)")
-                return TransitionResult(
-                    success=True,
-                    order_id=order_id,
-                    from_status=current_status,
-                    to_status=to_status,
-                    message=f"Order already in '{to_status}' status",
-                    is_noop=True
-                )
-            
-            # Check expected status if provided
-            if expected_from_status is not None:
-                normalized_current = OrderStatus.normalize(current_status)
-                normalized_expected = OrderStatus.normalize(expected_from_status)
-                
-                if normalized_current != normalized_expected:
-                    return TransitionResult(
-                        success=False,
-                        order_id=order_id,
-                        from_status=current_status,
-                        to_status=to_status,
-                        message=f"Order status mismatch: expected '{expected_from_status}', found '{current_status}'",
-                        error_code=OrderErrorCode.CONCURRENT_MODIFICATION.value
-                    )
-            
-            # TERMINAL STATE CHECK: Cannot transition out of terminal states
-            if OrderStatus.is_terminal(current_status):
-                return TransitionResult(
-                    success=False,
-                    order_id=order_id,
-                    from_status=current_status,
-                    to_status=to_status,
-                    message=f"Cannot transition from terminal state '{current_status}'",
-                    error_code=OrderErrorCode.ALREADY_PROCESSED.value
-                )
-            
-            # VALIDATE TRANSITION
-            if not is_valid_transition(current_status, to_status):
-                allowed = get_allowed_transitions(current_status)
-                return TransitionResult(
-                    success=False,
-                    order_id=order_id,
-                    from_status=current_status,
-                    to_status=to_status,
-                    message=f"Invalid transition: '{current_status}' -> '{to_status}'. Allowed: {allowed}",
-                    error_code=OrderErrorCode.INVALID_TRANSITION.value
-                )
-            
-            # Prepare metadata update
-            existing_metadata = order['metadata']
-            if isinstance(existing_metadata, str):
-                existing_metadata = json.loads(existing_metadata)
-            existing_metadata = existing_metadata or {}
-            
-            if metadata_patch:
-                existing_metadata.update(metadata_patch)
-            
-            # Add transition metadata
-            existing_metadata['last_transition'] = {
-                'from': current_status,
-                'to': to_status,
-                'actor_id': actor_id,
-                'actor_type': actor_type,
-                'reason': reason,
-                'timestamp': datetime.now(timezone.utc).isoformat(),
-                'correlation_id': correlation_id
-            }
-            
-            # Update order status
-            now = datetime.now(timezone.utc)
-            await conn.execute("""
-                UPDATE orders 
-                SET status = $1, 
-                    metadata = $2,
-                    updated_at = $3
-                WHERE order_id = $4
-            """, to_status, json.dumps(existing_metadata), now, order_id)
-            
-            # Get amount safely for audit logging
-            order_amount = _safe_float(order.get('amount'))
-            
-            # Write to CANONICAL audit_logs table (SINGLE SOURCE OF TRUTH)
-            audit_log_id = await write_order_audit(
-                conn=conn,
-                order_id=order_id,
-                user_id=order['user_id'],
-                username=order['username'],
-                action=f"order.transition.{to_status}",
-                from_status=current_status,
-                to_status=to_status,
-                actor_id=actor_id,
-                actor_type=actor_type,
-                amount=order_amount,
-                details={"reason": reason}
-            )
-            
+        # Update order status and write the CANONICAL audit_logs row
+        # (SINGLE SOURCE OF TRUTH) in one atomic round-trip
+        row = await conn.fetchrow(sql, *args)
+        
+        if row:
+            current_status = row['from_status']
             logger.info(
                 f"Order {order_id} transitioned: {current_status} -> {to_status} "
                 f"by {actor_type}:{actor_id} (reason: {reason})"
@@ -518,16 +911,126 @@ async def transition_order(
                 from_status=current_status,
                 to_status=to_status,
                 message=f"Successfully transitioned to '{to_status}'",
-                audit_log_id=audit_log_id
+                audit_log_id=row['log_id']
             )
+        
+        # Nothing matched: classify the failure from the current status
+        order = await conn.fetchrow(_SQL_ORDER_STATUS, order_id)
+        return _classify_failed_transition(
+            order_id, to_status, order, expected_from_status, require_approvable,
+            normalized_expected
+        )
             
     finally:
         if should_close:
             await pool.release(conn)
 
+async def bulk_transition(
+    order_ids: List[str],
+    to_status: str,
+    actor_id: str,
+    actor_type: str = "system",
+    reason: Optional[str] = None,
+    conn=None,
+    now: Optional[datetime] = None
+) -> List[TransitionResult]:
+    """
+    Transition many orders to the same status in one round-trip.
+    
+    Same rules as transition_order (valid source statuses, audit row per
+    order, no-op when already in to_status), but all matching orders are
+    locked, updated and audited by a single statement. Orders that were
+    not updated are classified with one follow-up SELECT.
+    
+    Returns:
+        One TransitionResult per distinct order_id, in input order
+    """
+    # Preserve input order, drop duplicates
+    order_ids = list(dict.fromkeys(order_ids))
+    if not order_ids:
+        return []
+    if now is None:
+        now = _now_utc()
+    
+    pool = await get_pool()
+    should_close = conn is None
+    
+    if conn is None:
+        conn = await pool.acquire()
+    
+    # order_id and from_status/amount are filled in per row by SQL
+    audit_details = _build_audit_details(
+        None, None, to_status, actor_id, actor_type,
+        None, {"reason": reason}
+    )
+    
+    try:
+        rows = await conn.fetch(
+            _SQL_BULK_TRANSITION,
+            to_status, now, order_ids,
+            [str(uuid.uuid4()) for _ in order_ids],
+            _ACTION_BY_STATUS.get(to_status) or f"order.transition.{to_status}",
+            _VALID_FROM_FOR_TO.get(to_status, []),
+            json_codec.dumps(audit_details)
+        )
+        
+        results: Dict[str, TransitionResult] = {}
+        for row in rows:
+            results[row['order_id']] = TransitionResult(
+                success=True,
+                order_id=row['order_id'],
+                from_status=row['from_status'],
+                to_status=to_status,
+                message=f"Successfully transitioned to '{to_status}'",
+                audit_log_id=row['log_id']
+            )
+        
+        missed = [order_id for order_id in order_ids if order_id not in results]
+        if missed:
+            current = {
+                row['order_id']: row
+                for row in await conn.fetch(_SQL_ORDERS_STATUS, missed)
+            }
+            for order_id in missed:
+                results[order_id] = _classify_failed_transition(
+                    order_id, to_status, current.get(order_id)
+                )
+        
+        logger.info(
+            f"Bulk transition to {to_status} by {actor_type}:{actor_id}: "
+            f"{len(rows)}/{len(order_ids)} updated (reason: {reason})"
+        )
+        
+        return [results[order_id] for order_id in order_ids]
+    
+    finally:
+        if should_close:
+            await pool.release(conn)
+
 
 # ==================== ORDER CREATION ====================
 
+# Order INSERT and its creation audit row as one statement
+_SQL_CREATE_ORDER = """
+    WITH new_order AS (
+        INSERT INTO orders (
+            order_id, user_id, username, order_type,
+            game_name, game_display_name,
+            amount, bonus_amount, total_amount,
+            referral_code, status, idempotency_key, metadata,
+            created_at, updated_at
+        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $14)
+        RETURNING order_id, user_id, username
+    )
+    INSERT INTO audit_logs (
+        log_id, user_id, username, action,
+        resource_type, resource_id, details, created_at
+    )
+    SELECT $15, user_id, username, $16, 'order', order_id, $17::jsonb, $14
+    FROM new_order
+"""
+
+
 async def create_order(
     user_id: str,
     username: str,
@@ -550,7 +1053,7 @@ async def create_order(
     2. Sets correct initial status based on order_type:
        - Approval-required types: pending_approval
        - Direct execution types: processing
-    3. Creates audit log entry
+    3. Creates the order and its audit log entry in one statement
     4. Returns the created order
     
     Args:
@@ -601,7 +1104,7 @@ async def create_order(
         
         # CREATE ORDER
         order_id = str(uuid.uuid4())
-        now = datetime.now(timezone.utc)
+        now = _now_utc()
         total_amount = amount + bonus_amount
         
         # Build metadata
@@ -611,41 +1114,27 @@ async def create_order(
         if payment_method:
             order_metadata['payment_method'] = payment_method
         
-        async with conn.transaction():
-            await conn.execute("""
-                INSERT INTO orders (
-                    order_id, user_id, username, order_type,
-                    game_name, game_display_name,
-                    amount, bonus_amount, total_amount,
-                    referral_code, status, idempotency_key, metadata,
-                    created_at, updated_at
-                ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $14)
-            """, order_id, user_id, username, order_type,
-                 game_name, game_display_name,
-                 amount, bonus_amount, total_amount,
-                 referral_code.upper() if referral_code else None,
-                 initial_status, idempotency_key, json.dumps(order_metadata), now)
-            
-            # Write to CANONICAL audit_logs table (SINGLE SOURCE OF TRUTH)
-            await write_order_audit(
-                conn=conn,
-                order_id=order_id,
-                user_id=user_id,
-                username=username,
-                action="order.created",
-                from_status=None,
-                to_status=initial_status,
-                actor_id=user_id,
-                actor_type="user",
-                amount=amount,
-                details={
-                    "order_type": order_type,
-                    "game_name": game_name,
-                    "bonus_amount": bonus_amount,
-                    "total_amount": total_amount,
-                    "idempotency_key": idempotency_key
-                }
-            )
+        # Order row and its CANONICAL audit_logs row (SINGLE SOURCE OF
+        # TRUTH) in one atomic round-trip
+        audit_details = _build_audit_details(
+            order_id, None, initial_status, user_id, "user", amount,
+            {
+                "order_type": order_type,
+                "game_name": game_name,
+                "bonus_amount": bonus_amount,
+                "total_amount": total_amount,
+                "idempotency_key": idempotency_key
+            }
+        )
+        await conn.execute(
+            _SQL_CREATE_ORDER,
+            order_id, user_id, username, order_type,
+            game_name, game_display_name,
+            amount, bonus_amount, total_amount,
+            referral_code.upper() if referral_code else None,
+            initial_status, idempotency_key, json_codec.dumps(order_metadata), now,
+            str(uuid.uuid4()), _CREATED_ACTION, json_codec.dumps(audit_details)
+        )
         
         logger.info(
             f"Order {order_id} created: type={order_type}, status={initial_status}, "
@@ -670,20 +1159,19 @@ async def create_order(
         }
         
     except Exception as e:
-        # Handle duplicate key constraint violation
-        if "duplicate key" in str(e).lower() or "unique" in str(e).lower():
-            if idempotency_key:
-                existing = await conn.fetchrow(
-                    "SELECT * FROM orders WHERE idempotency_key = $1",
-                    idempotency_key
-                )
-                if existing:
-                    return True, {
-                        "order_id": existing['order_id'],
-                        "status": existing['status'],
-                        "duplicate": True,
-                        "message": "Order already exists (race condition)"
-                    }
+        # Duplicate key: another request with the same idempotency key won the race
+        if isinstance(e, asyncpg.UniqueViolationError) and idempotency_key:
+            existing = await conn.fetchrow(
+                "SELECT * FROM orders WHERE idempotency_key = $1",
+                idempotency_key
+            )
+            if existing:
+                return True, {
+                    "order_id": existing['order_id'],
+                    "status": existing['status'],
+                    "duplicate": True,
+                    "message": "Order already exists (race condition)"
+                }
         
         logger.error(f"Failed to create order: {e}")
         return False, {
@@ -702,7 +1190,8 @@ async def approve_order(
     actor_id: str,
     actor_type: Literal["admin", "telegram_bot"] = "admin",
     final_amount: Optional[float] = None,
-    reason: Optional[str] = None
+    reason: Optional[str] = None,
+    conn=None
 ) -> TransitionResult:
     """
     Approve an order (transition pending_approval -> approved).
@@ -713,42 +1202,15 @@ async def approve_order(
         actor_type: admin or telegram_bot
         final_amount: Optional adjusted amount
         reason: Optional approval reason
+        conn: Optional database connection; pass conn to batch multiple
+              transitions in one transaction
     """
-    # Verify order exists and is approvable
-    order = await fetch_one("SELECT * FROM orders WHERE order_id = $1", order_id)
-    
-    if not order:
-        return TransitionResult(
-            success=False,
-            order_id=order_id,
-            from_status="",
-            to_status=OrderStatus.APPROVED.value,
-            message="Order not found",
-            error_code=OrderErrorCode.ORDER_NOT_FOUND.value
-        )
-    
-    # Check if order type requires approval
-    if is_direct_execution(order['order_type']):
-        return TransitionResult(
-            success=False,
-            order_id=order_id,
-            from_status=order['status'],
-            to_status=OrderStatus.APPROVED.value,
-            message=f"Order type '{order['order_type']}' does not require approval",
-            error_code=OrderErrorCode.NOT_APPROVABLE.value
-        )
-    
-    # Build metadata patch
+    # Existence and approvability are checked against the locked row
+    now = _now_utc()
     metadata_patch = {
         "approved_by": actor_id,
-        "approved_at": datetime.now(timezone.utc).isoformat(),
+        "approved_at": now,
     }
-    order_amount = _safe_float(order.get('amount'))
-    if final_amount is not None and final_amount != order_amount:
-        metadata_patch["amount_adjusted"] = True
-        metadata_patch["original_amount"] = order_amount
-        metadata_patch["adjusted_amount"] = final_amount
-        metadata_patch["adjusted_by"] = actor_id
     
     return await transition_order(
         order_id=order_id,
@@ -756,7 +1218,11 @@ async def approve_order(
         actor_id=actor_id,
         actor_type=actor_type,
         reason=reason or "Approved",
-        metadata_patch=metadata_patch
+        metadata_patch=metadata_patch,
+        now=now,
+        conn=conn,
+        require_approvable=True,
+        final_amount=final_amount
     )
 
 
@@ -764,14 +1230,18 @@ async def reject_order(
     order_id: str,
     actor_id: str,
     actor_type: Literal["admin", "telegram_bot"] = "admin",
-    reason: Optional[str] = None
+    reason: Optional[str] = None,
+    conn=None
 ) -> TransitionResult:
     """
     Reject an order (transition pending_approval -> rejected).
+    
+    Pass conn to batch multiple transitions in one transaction.
     """
+    now = _now_utc()
     metadata_patch = {
         "rejected_by": actor_id,
-        "rejected_at": datetime.now(timezone.utc).isoformat(),
+        "rejected_at": now,
         "rejection_reason": reason
     }
     
@@ -781,24 +1251,30 @@ async def reject_order(
         actor_id=actor_id,
         actor_type=actor_type,
         reason=reason or "Rejected by reviewer",
-        metadata_patch=metadata_patch
+        metadata_patch=metadata_patch,
+        now=now,
+        conn=conn
     )
 
 
 async def start_processing(
     order_id: str,
     actor_id: str = "system",
-    actor_type: Literal["admin", "telegram_bot", "system"] = "system"
+    actor_type: Literal["admin", "telegram_bot", "system"] = "system",
+    conn=None
 ) -> TransitionResult:
     """
     Start processing an order (transition approved -> processing).
+    
+    Pass conn to batch multiple transitions in one transaction.
     """
     return await transition_order(
         order_id=order_id,
         to_status=OrderStatus.PROCESSING.value,
         actor_id=actor_id,
         actor_type=actor_type,
-        reason="Processing started"
+        reason="Processing started",
+        conn=conn
     )
 
 
@@ -806,13 +1282,17 @@ async def complete_order(
     order_id: str,
     actor_id: str = "system",
     actor_type: Literal["admin", "telegram_bot", "system"] = "system",
-    execution_result: Optional[str] = None
+    execution_result: Optional[str] = None,
+    conn=None
 ) -> TransitionResult:
     """
     Mark order as completed (transition processing -> completed).
+    
+    Pass conn to batch multiple transitions in one transaction.
     """
+    now = _now_utc()
     metadata_patch = {
-        "completed_at": datetime.now(timezone.utc).isoformat(),
+        "completed_at": now,
         "execution_result": execution_result
     }
     
@@ -822,7 +1302,9 @@ async def complete_order(
         actor_id=actor_id,
         actor_type=actor_type,
         reason=execution_result or "Completed successfully",
-        metadata_patch=metadata_patch
+        metadata_patch=metadata_patch,
+        now=now,
+        conn=conn
     )
 
 
@@ -830,13 +1312,17 @@ async def fail_order(
     order_id: str,
     actor_id: str = "system",
     actor_type: Literal["admin", "telegram_bot", "system"] = "system",
-    error_message: Optional[str] = None
+    error_message: Optional[str] = None,
+    conn=None
 ) -> TransitionResult:
     """
     Mark order as failed (transition processing -> failed).
+    
+    Pass conn to batch multiple transitions in one transaction.
     """
+    now = _now_utc()
     metadata_patch = {
-        "failed_at": datetime.now(timezone.utc).isoformat(),
+        "failed_at": now,
         "error_message": error_message
     }
     
@@ -846,7 +1332,9 @@ async def fail_order(
         actor_id=actor_id,
         actor_type=actor_type,
         reason=error_message or "Processing failed",
-        metadata_patch=metadata_patch
+        metadata_patch=metadata_patch,
+        now=now,
+        conn=conn
     )
 
 
@@ -884,6 +1372,7 @@ __all__ = [
     
     # Core functions
     "transition_order",
+    "bulk_transition",
     "create_order",
     "TransitionResult",
     
@@ -896,6 +1385,9 @@ __all__ = [
     
     # Audit
     "write_order_audit",
+    "enqueue_audit_row",
+    "start_audit_flusher",
+    "stop_audit_flusher",
     
     # Setup (deprecated - using audit_logs)
     "ensure_audit_table_exists",
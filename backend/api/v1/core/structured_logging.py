@@ -2,25 +2,50 @@
 Structured Logging Module
 Provides consistent, correlation-aware logging for critical operations.
 """
+import base64
 import logging
-import json
-import uuid
+import logging.handlers
+import os
+import queue
+import threading
+import time
 from datetime import datetime, timezone
 from typing import Optional, Dict, Any
 from contextvars import ContextVar
 from functools import wraps
 
+from . import json_codec
+
 # Context variable for request correlation
 correlation_id: ContextVar[str] = ContextVar('correlation_id', default='')
 
 logger = logging.getLogger(__name__)
 
+# "YYYY-MM-DDTHH:MM:SS" for the current second, reformatted only when the
+# second changes
+_ts_sec = -1
+_ts_prefix = ""
+
+
+def _utc_timestamp() -> str:
+    """Current UTC time as ISO 8601 with microseconds and +00:00 offset."""
+    global _ts_sec, _ts_prefix
+    sec, ns = divmod(time.time_ns(), 1_000_000_000)
+    if sec != _ts_sec:
+        _ts_prefix = datetime.fromtimestamp(sec, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+        _ts_sec = sec
+    return f"{_ts_prefix}.{ns // 1000:06d}+00:00"
+
 
 class StructuredLogger:
     """
     Structured logger for critical operations.
     Outputs JSON-formatted logs with correlation IDs.
+    
+    Entries are only built when the level is enabled for the component
+    (isEnabledFor is cached by the logging module and reset on reconfig).
     """
+    __slots__ = ("component", "logger")
     
     def __init__(self, component: str):
         self.component = component
@@ -38,11 +63,11 @@ class StructuredLogger:
     ) -> Dict[str, Any]:
         """Build structured log entry."""
         log_entry = {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": _utc_timestamp(),
             "level": level,
             "component": self.component,
             "event": event,
-            "correlation_id": correlation_id.get() or generate_correlation_id(),
+            "correlation_id": get_correlation_id(),
         }
         
         if order_id:
@@ -60,23 +85,82 @@ class StructuredLogger:
     
     def info(self, event: str, **kwargs):
         """Log info level structured event."""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         log_entry = self._build_log(event, "INFO", **kwargs)
-        self.logger.info(json.dumps(log_entry))
+        self.logger.info(json_codec.dumps(log_entry))
     
     def warning(self, event: str, **kwargs):
         """Log warning level structured event."""
+        if not self.logger.isEnabledFor(logging.WARNING):
+            return
         log_entry = self._build_log(event, "WARNING", **kwargs)
-        self.logger.warning(json.dumps(log_entry))
+        self.logger.warning(json_codec.dumps(log_entry))
     
     def error(self, event: str, error: Optional[Exception] = None, **kwargs):
         """Log error level structured event."""
+        if not self.logger.isEnabledFor(logging.ERROR):
+            return
         extra = kwargs.pop('extra', {}) or {}
         if error:
             extra['error_type'] = type(error).__name__
             extra['error_message'] = str(error)
         kwargs['extra'] = extra
         log_entry = self._build_log(event, "ERROR", **kwargs)
-        self.logger.error(json.dumps(log_entry))
+        self.logger.error(json_codec.dumps(log_entry))
+
+
+# ==================== BACKGROUND WRITER ====================
+# Structured loggers are all children of "structured". While the writer
+# runs, their records go onto a bounded queue and a listener thread hands
+# them to the root handlers, so handler I/O never blocks the event loop.
+
+_LOG_QUEUE_MAX = 10000
+
+_log_listener: Optional[logging.handlers.QueueListener] = None
+_log_queue_handler: Optional[logging.Handler] = None
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when full."""
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+def start_structured_log_writer() -> None:
+    """Route structured logs through the background writer (call once at startup)."""
+    global _log_listener, _log_queue_handler
+    if _log_listener is not None:
+        return
+    
+    log_queue: queue.Queue = queue.Queue(maxsize=_LOG_QUEUE_MAX)
+    _log_listener = logging.handlers.QueueListener(
+        log_queue, *logging.getLogger().handlers, respect_handler_level=True
+    )
+    _log_queue_handler = _DroppingQueueHandler(log_queue)
+    
+    parent = logging.getLogger("structured")
+    parent.addHandler(_log_queue_handler)
+    parent.propagate = False
+    _log_listener.start()
+
+
+def stop_structured_log_writer() -> None:
+    """Flush queued structured logs and restore direct logging."""
+    global _log_listener, _log_queue_handler
+    if _log_listener is None:
+        return
+    
+    parent = logging.getLogger("structured")
+    parent.removeHandler(_log_queue_handler)
+    parent.propagate = True
+    _log_listener.stop()  # processes everything already queued
+    _log_listener = None
+    _log_queue_handler = None
 
 
 # Pre-configured loggers for different components
@@ -266,18 +350,39 @@ def log_games_api_response(
 
 # ==================== CORRELATION CONTEXT ====================
 
+# Random bytes for correlation IDs, read from os.urandom in blocks so the
+# syscall is paid once per _RAND_BLOCK // 16 IDs
+_RAND_BLOCK = 4096
+_rand_buf = b""
+_rand_off = _RAND_BLOCK
+_rand_lock = threading.Lock()
+_b64encode = base64.urlsafe_b64encode
+
+
+def _reset_rand_buf() -> None:
+    """Discard buffered bytes so forked workers never share IDs."""
+    global _rand_off
+    _rand_off = _RAND_BLOCK
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_rand_buf)
+
+
 def generate_correlation_id() -> str:
     """
     Generate a collision-safe correlation ID.
-    Returns a 22-character base64url-encoded UUID (collision-safe).
-    Format: Full UUID without hyphens, then base64url encoded and trimmed.
+    Returns a 22-character base64url-encoded 128-bit random value
+    (same entropy and format as a base64url UUID4, padding removed).
     """
-    import base64
-    # Generate full UUID bytes (16 bytes = 128 bits)
-    full_uuid = uuid.uuid4()
-    # Convert to base64url (22 chars after removing padding)
-    encoded = base64.urlsafe_b64encode(full_uuid.bytes).decode('ascii').rstrip('=')
-    return encoded  # 22 characters, collision-safe
+    global _rand_buf, _rand_off
+    with _rand_lock:
+        if _rand_off >= _RAND_BLOCK:
+            _rand_buf = os.urandom(_RAND_BLOCK)
+            _rand_off = 0
+        raw = _rand_buf[_rand_off:_rand_off + 16]
+        _rand_off += 16
+    return _b64encode(raw).rstrip(b'=').decode('ascii')  # 22 characters
 
 
 def set_correlation_id(cid: Optional[str] = None) -> str:
@@ -292,8 +397,13 @@ def set_correlation_id(cid: Optional[str] = None) -> str:
 
 
 def get_correlation_id() -> str:
-    """Get current correlation ID."""
+    """
+    Get current correlation ID.
+    If none is set, a new one is generated and stored in the context so
+    later log lines and audit rows in the same context share it.
+    """
     cid = correlation_id.get()
     if not cid or len(cid) < 16:
-        return generate_correlation_id()
+        cid = generate_correlation_id()
+        correlation_id.set(cid)
     return cid
@@ -7,12 +7,15 @@ PRODUCTION REQUIREMENTS:
 - TELEGRAM_WEBHOOK_SECRET must be set if Telegram is used
 - No fallback secrets in production
 """
+import asyncio
+import functools
 import hashlib
 import hmac
+import os
 import time
 import logging
-from typing import Optional
-from collections import OrderedDict
+from contextlib import nullcontext
+from typing import Dict, NamedTuple, Optional, Union
 from threading import Lock
 
 from .config import get_api_settings
@@ -24,26 +27,64 @@ settings = get_api_settings()
 
 # ==================== CONFIGURATION ====================
 
+class _SecuritySettings(NamedTuple):
+    """Plain snapshot of the settings read on every webhook."""
+    telegram_bot_token: str
+    telegram_webhook_secret: str
+    telegram_webhook_secret_bytes: bytes  # encoded once for compare_digest
+    telegram_chat_id: str
+    webhook_signing_secret: Optional[str]
+    is_production: bool
+
+
+def _snapshot_settings() -> _SecuritySettings:
+    """Copy the webhook-related settings out of the settings object."""
+    telegram_webhook_secret = settings.telegram_webhook_secret or ''
+    return _SecuritySettings(
+        telegram_bot_token=settings.telegram_bot_token or '',
+        telegram_webhook_secret=telegram_webhook_secret,
+        telegram_webhook_secret_bytes=telegram_webhook_secret.encode(),
+        telegram_chat_id=settings.telegram_chat_id or '',
+        webhook_signing_secret=settings.webhook_signing_secret,
+        is_production=settings.is_production,
+    )
+
+
+_sec = _snapshot_settings()
+
+
+def refresh_security_settings() -> None:
+    """Re-read settings into the snapshot and drop derived caches."""
+    global settings, _sec
+    settings = get_api_settings()
+    _sec = _snapshot_settings()
+    _get_webhook_signing_secret.cache_clear()
+    _hmac_template.cache_clear()
+
+
 def _get_telegram_bot_token() -> str:
     """Get Telegram bot token from settings."""
-    return settings.telegram_bot_token or ''
+    return _sec.telegram_bot_token
 
 
 def _get_telegram_webhook_secret() -> str:
     """Get Telegram webhook secret from settings."""
-    return settings.telegram_webhook_secret or ''
+    return _sec.telegram_webhook_secret
 
 
+@functools.lru_cache(maxsize=1)
 def _get_webhook_signing_secret() -> str:
     """
     Get webhook signing secret from settings.
     
     In production, this must be set and strong.
     In development, falls back to a placeholder (with warning).
+    Resolved once per settings snapshot; together with
+    _hmac_template this keeps secret.encode() off the per-webhook path.
     """
-    secret = settings.webhook_signing_secret
+    secret = _sec.webhook_signing_secret
     
-    if settings.is_production:
+    if _sec.is_production:
         if not secret or len(secret) < 32:
             logger.error("WEBHOOK_SIGNING_SECRET not properly configured for production")
             return ''  # Will cause signature verification to fail
@@ -62,35 +103,75 @@ TIMESTAMP_TOLERANCE = 300  # 5 minutes
 # Replay protection cache size
 REPLAY_CACHE_SIZE = 10000
 
+# Oldest entries dropped at once when the replay cache is full
+REPLAY_EVICT_BATCH = 64
+
+# Event IDs longer than this are stored as a 16-byte keyed BLAKE2b digest
+REPLAY_KEY_MAX_LEN = 64
+
+# Per-process key for replay digests
+_REPLAY_PEPPER = os.urandom(16)
+
+
+def _replay_key(event_id: str) -> Union[str, bytes]:
+    """Cache key for an event ID: short IDs as-is, long ones digested."""
+    if len(event_id) <= REPLAY_KEY_MAX_LEN:
+        return event_id
+    return hashlib.blake2b(
+        event_id.encode(), digest_size=16, key=_REPLAY_PEPPER
+    ).digest()
+
 
 # ==================== REPLAY PROTECTION ====================
 
 class ReplayProtectionCache:
     """
-    Thread-safe LRU cache for storing processed event IDs.
+    FIFO cache for storing processed event IDs.
     Prevents replay attacks by rejecting duplicate event IDs.
+    
+    Backed by a plain dict (insertion-ordered); when full, the oldest
+    REPLAY_EVICT_BATCH entries are dropped in one pass. Long event IDs are
+    keyed by digest so each entry has a bounded size. Entry ages use
+    time.monotonic(), so wall-clock adjustments do not affect expiry.
+    
+    With thread_safe=False no lock is taken: only use that for caches
+    touched solely from the event loop thread, where check_and_mark runs
+    without awaiting and so cannot interleave with another call.
     """
     
-    def __init__(self, max_size: int = REPLAY_CACHE_SIZE):
+    def __init__(self, max_size: int = REPLAY_CACHE_SIZE, thread_safe: bool = True):
         self.max_size = max_size
-        self._cache: OrderedDict[str, float] = OrderedDict()
-        self._lock = Lock()
+        self._cache: Dict[Union[str, bytes], float] = {}
+        self._contains = self._cache.__contains__
+        self._lock = Lock() if thread_safe else nullcontext()
+    
+    def _evict_oldest(self) -> None:
+        """Drop the oldest entries if at capacity (caller holds the lock)."""
+        if len(self._cache) >= self.max_size:
+            oldest = iter(self._cache)
+            stale = [next(oldest) for _ in range(min(REPLAY_EVICT_BATCH, len(self._cache)))]
+            for key in stale:
+                del self._cache[key]
     
     def is_duplicate(self, event_id: str) -> bool:
-        """Check if event ID was already processed."""
-        with self._lock:
-            if event_id in self._cache:
-                return True
-            return False
+        """
+        Check if event ID was already processed.
+        Read-only, so no lock: a single dict lookup is atomic under the
+        GIL. Use check_and_mark when the check must be atomic with marking.
+        """
+        return self._contains(_replay_key(event_id))
     
     def mark_processed(self, event_id: str) -> None:
         """Mark event ID as processed."""
+        key = _replay_key(event_id)
         with self._lock:
+            # Re-marking moves the entry to the end to keep time order
+            self._cache.pop(key, None)
+            
             # Remove oldest if at capacity
-            while len(self._cache) >= self.max_size:
-                self._cache.popitem(last=False)
+            self._evict_oldest()
             
-            self._cache[event_id] = time.time()
+            self._cache[key] = time.monotonic()
     
     def check_and_mark(self, event_id: str) -> bool:
         """
@@ -98,43 +179,90 @@ class ReplayProtectionCache:
         Returns True if this is a NEW event (not a replay).
         Returns False if this is a DUPLICATE (replay attack).
         """
+        key = _replay_key(event_id)
         with self._lock:
-            if event_id in self._cache:
+            if key in self._cache:
                 logger.warning(f"Replay attack detected: event_id={event_id}")
                 return False
             
             # Remove oldest if at capacity
-            while len(self._cache) >= self.max_size:
-                self._cache.popitem(last=False)
+            self._evict_oldest()
             
-            self._cache[event_id] = time.time()
+            self._cache[key] = time.monotonic()
             return True
     
     def cleanup_old(self, max_age_seconds: int = 3600) -> int:
-        """Remove entries older than max_age_seconds. Returns count removed."""
-        cutoff = time.time() - max_age_seconds
+        """
+        Remove entries older than max_age_seconds. Returns count removed.
+        Entries are kept in insertion (= time) order, so this stops at the
+        first fresh entry: O(expired), not O(size).
+        """
+        cutoff = time.monotonic() - max_age_seconds
         removed = 0
         
         with self._lock:
-            keys_to_remove = [k for k, v in self._cache.items() if v < cutoff]
-            for key in keys_to_remove:
-                del self._cache[key]
+            cache = self._cache
+            while cache:
+                key = next(iter(cache))
+                if cache[key] >= cutoff:
+                    break
+                del cache[key]
                 removed += 1
         
         return removed
 
 
-# Global replay protection caches
-telegram_replay_cache = ReplayProtectionCache()
-webhook_replay_cache = ReplayProtectionCache()
+# Global replay protection caches (checked from async endpoints only)
+telegram_replay_cache = ReplayProtectionCache(thread_safe=False)
+webhook_replay_cache = ReplayProtectionCache(thread_safe=False)
+
+# Background expiry of the global caches
+REPLAY_SWEEP_INTERVAL = 60  # seconds
+REPLAY_MAX_AGE = 3600  # seconds
+
+_replay_sweeper_task: Optional[asyncio.Task] = None
+
+
+async def _sweep_replay_caches() -> None:
+    """Periodically drop expired entries from the global replay caches."""
+    while True:
+        await asyncio.sleep(REPLAY_SWEEP_INTERVAL)
+        removed = (
+            telegram_replay_cache.cleanup_old(REPLAY_MAX_AGE)
+            + webhook_replay_cache.cleanup_old(REPLAY_MAX_AGE)
+        )
+        if removed:
+            logger.debug(f"Replay cache sweep removed {removed} entries")
+
+
+def start_replay_cache_sweeper() -> None:
+    """Start the background replay cache sweep (call once from app startup)."""
+    global _replay_sweeper_task
+    if _replay_sweeper_task is None:
+        _replay_sweeper_task = asyncio.create_task(_sweep_replay_caches())
+
+
+async def stop_replay_cache_sweeper() -> None:
+    """Stop the background replay cache sweep."""
+    global _replay_sweeper_task
+    if _replay_sweeper_task is None:
+        return
+    _replay_sweeper_task.cancel()
+    try:
+        await _replay_sweeper_task
+    except asyncio.CancelledError:
+        pass
+    _replay_sweeper_task = None
 
 
 # ==================== TELEGRAM SECURITY ====================
 
+@functools.lru_cache(maxsize=4)
 def compute_telegram_secret_hash(bot_token: str) -> str:
     """
     Compute the secret token hash for Telegram webhook verification.
     Telegram sends this in X-Telegram-Bot-Api-Secret-Token header.
+    Memoized: the bot token is fixed for the life of the process.
     """
     return hashlib.sha256(bot_token.encode()).hexdigest()[:32]
 
@@ -153,7 +281,7 @@ def verify_telegram_webhook(
     Returns:
         (is_valid, error_message)
     """
-    telegram_secret = _get_telegram_webhook_secret()
+    telegram_secret = _sec.telegram_webhook_secret_bytes
     
     # Check 1: Secret token verification (if configured)
     if telegram_secret:
@@ -161,10 +289,10 @@ def verify_telegram_webhook(
             return False, "Missing X-Telegram-Bot-Api-Secret-Token header"
         
         # Use constant-time comparison
-        if not hmac.compare_digest(secret_token_header, telegram_secret):
+        if not hmac.compare_digest(secret_token_header.encode(), telegram_secret):
             logger.warning("Invalid Telegram webhook secret token")
             return False, "Invalid secret token"
-    elif settings.is_production:
+    elif _sec.is_production:
         # In production, Telegram secret is required if bot token is set
         if _get_telegram_bot_token():
             logger.error("TELEGRAM_WEBHOOK_SECRET not configured but TELEGRAM_BOT_TOKEN is set")
@@ -195,22 +323,29 @@ def verify_telegram_webhook(
 
 # ==================== GENERAL WEBHOOK SECURITY ====================
 
+_HMAC_DIGESTS = {
+    'sha256': hashlib.sha256,
+    'sha1': hashlib.sha1,
+}
+
+
+@functools.lru_cache(maxsize=32)
+def _hmac_template(secret: str, algorithm: str) -> hmac.HMAC:
+    """
+    Keyed HMAC with no data, built once per (secret, algorithm).
+    Callers must .copy() it; the template itself is never updated.
+    """
+    digest = _HMAC_DIGESTS.get(algorithm)
+    if digest is None:
+        raise ValueError(f"Unsupported algorithm: {algorithm}")
+    return hmac.new(secret.encode(), None, digest)
+
+
 def compute_hmac_signature(payload: bytes, secret: str, algorithm: str = 'sha256') -> str:
     """Compute HMAC signature for webhook payload."""
-    if algorithm == 'sha256':
-        return hmac.new(
-            secret.encode(),
-            payload,
-            hashlib.sha256
-        ).hexdigest()
-    elif algorithm == 'sha1':
-        return hmac.new(
-            secret.encode(),
-            payload,
-            hashlib.sha1
-        ).hexdigest()
-    else:
-        raise ValueError(f"Unsupported algorithm: {algorithm}")
+    mac = _hmac_template(secret, algorithm).copy()
+    mac.update(payload)
+    return mac.hexdigest()
 
 
 def verify_webhook_signature(
@@ -241,8 +376,15 @@ def verify_webhook_signature(
     if not signature_header:
         return False, "Missing signature header"
     
-    # Parse signature header (handle "sha256=xxxx" format)
-    if '=' in signature_header:
+    # Parse signature header (handle "sha256=xxxx" format); the common
+    # lowercase prefixes skip the split
+    if signature_header.startswith('sha256='):
+        algorithm = 'sha256'
+        provided_signature = signature_header[7:]
+    elif signature_header.startswith('sha1='):
+        algorithm = 'sha1'
+        provided_signature = signature_header[5:]
+    elif '=' in signature_header:
         parts = signature_header.split('=', 1)
         algo_prefix = parts[0].lower()
         provided_signature = parts[1]
@@ -324,4 +466,4 @@ def get_telegram_bot_token() -> str:
 
 def get_telegram_chat_id() -> str:
     """Get Telegram chat ID from settings."""
-    return settings.telegram_chat_id or ''
+    return _sec.telegram_chat_id
@@ -9,6 +9,9 @@ from slowapi.errors import RateLimitExceeded
 import os
 
 # Initialize limiter
+# fixed-window is the cheapest strategy on Redis: the limits storage
+# backend does INCR + EXPIRE in one Lua EVALSHA, i.e. one round-trip per
+# limit check (moving-window needs a list scan per hit)
 limiter = Limiter(
     key_func=get_remote_address,
     default_limits=["200/minute"],
@@ -9,6 +9,14 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Pre-encoded (lowercase name, value) pairs appended to every response
+_SECURITY_HEADERS = [
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"referrer-policy", b"no-referrer"),
+]
+_SECURITY_HEADER_NAMES = frozenset(name for name, _ in _SECURITY_HEADERS)
+
 
 class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     """
@@ -23,9 +31,13 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next) -> Response:
         response = await call_next(request)
         
-        # Add security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["Referrer-Policy"] = "no-referrer"
+        # Add security headers, replacing any the route already set
+        raw_headers = response.raw_headers
+        if any(name in _SECURITY_HEADER_NAMES for name, _ in raw_headers):
+            raw_headers[:] = [
+                header for header in raw_headers
+                if header[0] not in _SECURITY_HEADER_NAMES
+            ]
+        raw_headers.extend(_SECURITY_HEADERS)
         
         return response
@@ -2,20 +2,26 @@
 Request Tracing Middleware
 Adds correlation IDs for distributed tracing
 """
-import uuid
 import time
 from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware
 import logging
 
+from ..core import json_codec
+from ..core.structured_logging import generate_correlation_id, set_correlation_id
+
 logger = logging.getLogger(__name__)
 
 class RequestTracingMiddleware(BaseHTTPMiddleware):
     """Add correlation ID and request timing to all requests"""
     
     async def dispatch(self, request: Request, call_next):
-        # Generate or extract correlation ID
-        correlation_id = request.headers.get("X-Correlation-ID", str(uuid.uuid4()))
+        # Extract correlation ID, generating one only if the header is absent
+        correlation_id = request.headers.get("X-Correlation-ID")
+        if correlation_id is None:
+            correlation_id = generate_correlation_id()
+        # Share it with structured logs and audit rows for this request
+        correlation_id = set_correlation_id(correlation_id)
         request.state.correlation_id = correlation_id
         
         # Start timing
@@ -31,17 +37,16 @@ class RequestTracingMiddleware(BaseHTTPMiddleware):
         response.headers["X-Correlation-ID"] = correlation_id
         response.headers["X-Response-Time"] = f"{duration:.3f}s"
         
-        # Log request
-        logger.info(
-            f"{request.method} {request.url.path}",
-            extra={
+        # Log request as one pre-serialized JSON line (the root formatter
+        # only prints the message, so `extra=` fields were never shown)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json_codec.dumps({
                 "correlation_id": correlation_id,
                 "method": request.method,
                 "path": request.url.path,
                 "status_code": response.status_code,
                 "duration": duration,
-                "client_ip": request.client.host
-            }
-        )
+                "client_ip": request.client.host if request.client else None
+            }))
         
         return response
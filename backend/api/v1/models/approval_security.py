@@ -6,38 +6,54 @@ import os
 import logging
 import hashlib
 import time
-from datetime import datetime, timezone, timedelta
-from typing import Optional, Tuple, List, Set
+import uuid
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Optional, Tuple, List, FrozenSet
 from enum import Enum
-from collections import OrderedDict
 from threading import Lock
 
+from .order_types import FLOWS
+from ..core import json_codec
+from ..core.order_lifecycle import enqueue_audit_row
+
 logger = logging.getLogger(__name__)
 
 
 # ==================== CONFIGURATION ====================
 
-def get_admin_whitelist() -> Set[str]:
+@lru_cache(maxsize=1)
+def get_admin_whitelist() -> FrozenSet[str]:
     """
     Get whitelisted admin chat IDs from environment.
     Format: TELEGRAM_ADMIN_IDS=123456,789012,345678
+    
+    Parsed once per process; call _reset_env_cache() after
+    changing the environment (tests).
     """
     ids_str = os.environ.get('TELEGRAM_ADMIN_IDS', '')
     if not ids_str:
         # Fallback to single TELEGRAM_CHAT_ID if no whitelist configured
         single_id = os.environ.get('TELEGRAM_CHAT_ID', '')
         if single_id:
-            return {str(single_id)}
-        return set()
+            return frozenset({str(single_id)})
+        return frozenset()
     
-    return {str(id.strip()) for id in ids_str.split(',') if id.strip()}
+    return frozenset(str(id.strip()) for id in ids_str.split(',') if id.strip())
 
 
+@lru_cache(maxsize=1)
 def get_approval_expiry_minutes() -> int:
     """Get approval expiry time in minutes from environment."""
     return int(os.environ.get('APPROVAL_EXPIRY_MINUTES', '60'))
 
 
+def _reset_env_cache() -> None:
+    """Forget cached environment values so they are re-read on next use."""
+    get_admin_whitelist.cache_clear()
+    get_approval_expiry_minutes.cache_clear()
+
+
 # ==================== APPROVAL ACTIONS ====================
 
 class ApprovalAction(str, Enum):
@@ -82,68 +98,148 @@ PAYMENT_OUT_ACTIONS = {
 # ==================== STATE MACHINE ====================
 
 # Valid status transitions
+_PENDING_EXITS = frozenset({"approved", "rejected", "failed", "cancelled"})
+_TERMINAL = frozenset()  # Terminal state
+
 VALID_TRANSITIONS = {
-    "pending_approval": {"approved", "rejected", "failed", "cancelled"},
-    "pending_review": {"approved", "rejected", "failed", "cancelled"},  # legacy
-    "awaiting_payment_proof": {"approved", "rejected", "failed", "cancelled"},  # legacy
-    "initiated": {"approved", "rejected", "failed", "cancelled"},  # legacy
-    "approved": {"completed", "failed"},
-    "completed": set(),  # Terminal state
-    "failed": {"approved"},  # Can retry
-    "rejected": set(),  # Terminal state
-    "cancelled": set(),  # Terminal state
+    "pending_approval": _PENDING_EXITS,
+    "pending_review": _PENDING_EXITS,  # legacy
+    "awaiting_payment_proof": _PENDING_EXITS,  # legacy
+    "initiated": _PENDING_EXITS,  # legacy
+    "approved": frozenset({"completed", "failed"}),
+    "completed": _TERMINAL,
+    "failed": frozenset({"approved"}),  # Can retry
+    "rejected": _TERMINAL,
+    "cancelled": _TERMINAL,
 }
 
+# Flattened (current, new) pairs: one hash probe per transition check
+VALID_EDGES: FrozenSet[Tuple[str, str]] = frozenset(
+    (current, new) for current, allowed in VALID_TRANSITIONS.items() for new in allowed
+)
+
 
 def is_valid_transition(current_status: str, new_status: str) -> bool:
     """Check if a status transition is allowed by the state machine."""
-    allowed = VALID_TRANSITIONS.get(current_status, set())
-    return new_status in allowed
+    return (current_status, new_status) in VALID_EDGES
 
 
 # ==================== SINGLE-USE APPROVAL TOKENS ====================
 
+# Bloom filter sizing: 2**23 bits (1 MiB) per generation with 4 probes
+# gives a false-positive rate around 3e-7 at 50000 tokens. The bits are
+# split across APPROVAL_CACHE_SHARDS independently locked shards.
+APPROVAL_BLOOM_BITS = 1 << 23
+APPROVAL_BLOOM_PROBES = 4
+APPROVAL_CACHE_SHARDS = 16
+
+
+class _BloomShard:
+    """One lock-protected slice of the approval Bloom filter (two generations)."""
+    __slots__ = ("capacity", "num_bits", "current", "previous", "count", "lock")
+    
+    def __init__(self, capacity: int, num_bits: int):
+        self.capacity = capacity
+        self.num_bits = num_bits
+        self.current = bytearray(num_bits // 8)
+        self.previous = bytearray(num_bits // 8)
+        self.count = 0  # tokens added to the current generation
+        self.lock = Lock()
+    
+    @staticmethod
+    def _contains(bits: bytearray, probes: List[int]) -> bool:
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in probes)
+    
+    def mark(self, probes: List[int]) -> bool:
+        """Set the probe bits; True if the token was not already present."""
+        with self.lock:
+            # Rotate generations when the current one is full
+            if self.count >= self.capacity:
+                self.previous = self.current
+                self.current = bytearray(self.num_bits // 8)
+                self.count = 0
+            
+            # Check and set in one pass: the token is new to the current
+            # generation iff at least one of its bits was still clear
+            current = self.current
+            newly_set = False
+            for p in probes:
+                index, mask = p >> 3, 1 << (p & 7)
+                if not current[index] & mask:
+                    current[index] |= mask
+                    newly_set = True
+            if newly_set:
+                self.count += 1
+            
+            return newly_set and not self._contains(self.previous, probes)
+    
+    def contains(self, probes: List[int]) -> bool:
+        with self.lock:
+            return self._contains(self.current, probes) or self._contains(self.previous, probes)
+
+
 class ApprovalTokenCache:
     """
     Tracks used approval tokens to prevent button reuse.
     Token format: {order_id}_{action}_{timestamp}
+    
+    Used (order_id, action) pairs are kept in two generations of Bloom
+    filter bits instead of a dict of strings, so memory is fixed
+    regardless of traffic. Once a generation is full it becomes the
+    previous one and a fresh one starts, so roughly the last max_size
+    tokens are always remembered. A false positive only rejects a button
+    press as already used (fail closed). Tokens are spread over
+    independently locked shards so concurrent approvals rarely contend.
     """
     
-    def __init__(self, max_size: int = 50000):
+    __slots__ = ("max_size", "_shards")
+    
+    def __init__(
+        self,
+        max_size: int = 50000,
+        num_bits: int = APPROVAL_BLOOM_BITS,
+        num_shards: int = APPROVAL_CACHE_SHARDS
+    ):
         self.max_size = max_size
-        self._used_tokens: OrderedDict[str, float] = OrderedDict()
-        self._lock = Lock()
+        shard_capacity = -(-max_size // num_shards)
+        self._shards = [
+            _BloomShard(shard_capacity, num_bits // num_shards) for _ in range(num_shards)
+        ]
+    
+    def _locate(self, order_id: str, action: str) -> Tuple[_BloomShard, List[int]]:
+        """Shard and bit positions for a token (double hashing over one BLAKE2b digest)."""
+        digest = hashlib.blake2b(f"{order_id}:{action}".encode(), digest_size=20).digest()
+        shard = self._shards[int.from_bytes(digest[16:], 'little') % len(self._shards)]
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:16], 'little') | 1
+        num_bits = shard.num_bits
+        return shard, [(h1 + i * h2) % num_bits for i in range(APPROVAL_BLOOM_PROBES)]
     
     def generate_token(self, order_id: str, action: str) -> str:
-        """Generate a unique approval token."""
+        """
+        Generate a unique approval token (16 hex chars).
+        Not used for dedup (mark_used keys on order_id:action) and not a
+        secret, so a fast 64-bit BLAKE2b digest is enough.
+        """
         timestamp = int(time.time())
         token_str = f"{order_id}:{action}:{timestamp}"
-        return hashlib.sha256(token_str.encode()).hexdigest()[:16]
+        return hashlib.blake2b(token_str.encode(), digest_size=8).hexdigest()
     
     def mark_used(self, order_id: str, action: str) -> bool:
         """
         Mark an approval as used. Returns True if this is first use.
         Returns False if already used (replay attempt).
         """
-        token = f"{order_id}:{action}"
-        
-        with self._lock:
-            if token in self._used_tokens:
-                logger.warning(f"Approval button reuse detected: order={order_id}, action={action}")
-                return False
-            
-            # Cleanup old entries
-            while len(self._used_tokens) >= self.max_size:
-                self._used_tokens.popitem(last=False)
-            
-            self._used_tokens[token] = time.time()
-            return True
+        shard, probes = self._locate(order_id, action)
+        if not shard.mark(probes):
+            logger.warning(f"Approval button reuse detected: order={order_id}, action={action}")
+            return False
+        return True
     
     def is_used(self, order_id: str, action: str) -> bool:
         """Check if approval has already been used."""
-        token = f"{order_id}:{action}"
-        with self._lock:
-            return token in self._used_tokens
+        shard, probes = self._locate(order_id, action)
+        return shard.contains(probes)
 
 
 # Global instance
@@ -166,26 +262,29 @@ def is_approval_expired(created_at: datetime, expiry_minutes: Optional[int] = No
     if created_at.tzinfo is None:
         created_at = created_at.replace(tzinfo=timezone.utc)
     
-    now = datetime.now(timezone.utc)
-    expiry_time = created_at + timedelta(minutes=expiry_minutes)
+    # Plain epoch-seconds arithmetic; no datetime/timedelta objects
+    expiry_ts = created_at.timestamp() + expiry_minutes * 60
+    now_ts = time.time()
     
-    if now > expiry_time:
+    if now_ts > expiry_ts:
         return True, 0
     
-    remaining = int((expiry_time - now).total_seconds() / 60)
+    remaining = int((expiry_ts - now_ts) / 60)
     return False, remaining
 
 
 # ==================== ADMIN VERIFICATION ====================
 
-def verify_admin(chat_id: str) -> Tuple[bool, str]:
+def verify_admin(chat_id: str, whitelist: Optional[FrozenSet[str]] = None) -> Tuple[bool, str]:
     """
     Verify that a chat ID is in the admin whitelist.
+    Pass `whitelist` if the caller already fetched it.
     
     Returns:
         (is_valid, error_message)
     """
-    whitelist = get_admin_whitelist()
+    if whitelist is None:
+        whitelist = get_admin_whitelist()
     
     if not whitelist:
         logger.warning("No admin whitelist configured - allowing all (INSECURE)")
@@ -201,6 +300,9 @@ def verify_admin(chat_id: str) -> Tuple[bool, str]:
 
 # ==================== COMPREHENSIVE APPROVAL CHECK ====================
 
+_BUTTON_USED_ERROR = "This approval button has already been used"
+
+
 async def verify_approval_request(
     order_id: str,
     action: str,
@@ -222,19 +324,23 @@ async def verify_approval_request(
     Returns:
         (is_valid, error_message)
     """
+    # Configuration read once for all checks
+    whitelist = get_admin_whitelist()
+    expiry_minutes = get_approval_expiry_minutes()
+    
     # 1. Verify admin whitelist
-    is_admin, error = verify_admin(admin_chat_id)
+    is_admin, error = verify_admin(admin_chat_id, whitelist)
     if not is_admin:
         return False, error
     
     # 2. Check expiry
-    is_expired, minutes_remaining = is_approval_expired(order_created_at)
+    is_expired, minutes_remaining = is_approval_expired(order_created_at, expiry_minutes)
     if is_expired:
-        return False, f"Approval request expired (created {get_approval_expiry_minutes()} minutes ago)"
+        return False, f"Approval request expired (created {expiry_minutes} minutes ago)"
     
     # 3. Check single-use (button reuse)
     if not approval_token_cache.mark_used(order_id, action):
-        return False, f"This approval button has already been used"
+        return False, _BUTTON_USED_ERROR
     
     # 4. Validate status transition
     target_status = get_target_status(action)
@@ -249,40 +355,75 @@ async def verify_approval_request(
     return True, ""
 
 
+# Action -> target order status
+_TARGET_STATUS_MAP = {
+    "approve": "approved",
+    "reject": "rejected",
+    "failed": "failed",
+    "sent": "approved",  # For withdrawals, "sent" means approved
+    "duplicate": "rejected",
+    "suspicious": "rejected",
+    "tag_changed": "rejected",
+}
+
+
 def get_target_status(action: str) -> Optional[str]:
     """Map action to target status."""
-    mapping = {
-        "approve": "approved",
-        "reject": "rejected",
-        "failed": "failed",
-        "sent": "approved",  # For withdrawals, "sent" means approved
-        "duplicate": "rejected",
-        "suspicious": "rejected",
-        "tag_changed": "rejected",
-    }
-    return mapping.get(action)
+    return _TARGET_STATUS_MAP.get(action)
 
 
-def validate_action_for_order_type(action: str, order_type: str) -> Tuple[bool, str]:
-    """Validate that the action is appropriate for the order type."""
+_PAYMENT_IN_ORDER_TYPES = frozenset({'wallet_load', 'deposit'})
+_PAYMENT_OUT_ORDER_TYPES = frozenset({'withdrawal_wallet', 'withdrawal_game', 'withdrawal'})
+_CHECKED_ORDER_TYPES = _PAYMENT_IN_ORDER_TYPES | _PAYMENT_OUT_ORDER_TYPES
+
+
+def _action_order_type_error(action: str, order_type: str) -> str:
+    """Return why the action is invalid for the order type, or '' if it is valid."""
     # Normalize action
     action_lower = action.lower()
     
     # Payment IN types
-    if order_type in ('wallet_load', 'deposit'):
+    if order_type in _PAYMENT_IN_ORDER_TYPES:
         if action_lower.startswith('w'):  # withdrawal actions
-            return False, f"Action '{action}' not valid for wallet load orders"
+            return f"Action '{action}' not valid for wallet load orders"
     
     # Payment OUT types
-    elif order_type in ('withdrawal_wallet', 'withdrawal_game', 'withdrawal'):
+    elif order_type in _PAYMENT_OUT_ORDER_TYPES:
         if action_lower == 'approve':
-            return False, "Use 'sent' action for withdrawals, not 'approve'"
+            return "Use 'sent' action for withdrawals, not 'approve'"
     
-    return True, ""
+    return ""
+
+
+# Known (action, order_type) pairs that pass, decided once at import
+_VALID_ACTION_ORDER_PAIRS: FrozenSet[Tuple[str, str]] = frozenset(
+    (a.value, order_type)
+    for a in ApprovalAction
+    for order_type in _CHECKED_ORDER_TYPES
+    if not _action_order_type_error(a.value, order_type)
+)
+
+
+def validate_action_for_order_type(action: str, order_type: str) -> Tuple[bool, str]:
+    """Validate that the action is appropriate for the order type."""
+    if order_type not in _CHECKED_ORDER_TYPES or (action, order_type) in _VALID_ACTION_ORDER_PAIRS:
+        return True, ""
+    
+    # Rejected pairs, unknown actions and non-lowercase input take the full rule
+    error = _action_order_type_error(action, order_type)
+    return not error, error
 
 
 # ==================== AUDIT LOGGING ====================
 
+# Kept as one constant so asyncpg's statement cache reuses the prepared plan
+_SQL_INSERT_AUDIT_LOG = """
+    INSERT INTO audit_logs 
+    (log_id, user_id, username, action, resource_type, resource_id, details, created_at)
+    VALUES ($1, $2, $3, $4, 'order', $5, $6, $7)
+"""
+
+
 async def log_approval_action(
     conn,
     order_id: str,
@@ -298,14 +439,17 @@ async def log_approval_action(
     """
     Log approval action to audit_logs table.
     
+    With a connection the row is inserted on it (inside the caller's
+    transaction, if any). With conn=None the row is queued for the
+    batched background audit writer.
+    
     Returns:
         log_id
     """
-    import uuid
-    import json
-    
     log_id = str(uuid.uuid4())
+    now = datetime.now(timezone.utc)
     
+    # The event time is stored once, in the row's created_at column
     details = {
         "order_id": order_id,
         "action": action,
@@ -314,19 +458,21 @@ async def log_approval_action(
         "previous_status": previous_status,
         "new_status": new_status,
         "amount": amount,
-        "timestamp": datetime.now(timezone.utc).isoformat(),
     }
     
     if extra_data:
         details.update(extra_data)
     
+    username = admin_username or f"admin_{admin_chat_id}"
+    
     try:
-        await conn.execute("""
-            INSERT INTO audit_logs 
-            (log_id, user_id, username, action, resource_type, resource_id, details, created_at)
-            VALUES ($1, $2, $3, $4, 'order', $5, $6, NOW())
-        """, log_id, user_id, admin_username or f"admin_{admin_chat_id}",
-             f"telegram.{action}", order_id, json.dumps(details))
+        if conn is None:
+            await enqueue_audit_row(
+                log_id, user_id, username, f"telegram.{action}", order_id, details, now
+            )
+        else:
+            await conn.execute(_SQL_INSERT_AUDIT_LOG, log_id, user_id, username,
+                 f"telegram.{action}", order_id, json_codec.dumps(details), now)
         
         logger.info(f"Audit log created: {action} on order {order_id[:8]} by {admin_chat_id}")
         
@@ -338,6 +484,16 @@ async def log_approval_action(
 
 # ==================== FLOW RULES ENFORCEMENT ====================
 
+_REQUIRES_APPROVAL_MAP = {
+    'wallet_load': True,
+    'deposit': True,  # Legacy
+    'withdrawal_wallet': True,
+    'withdrawal_game': True,
+    'withdrawal': True,  # Legacy
+    'game_load': False,  # Instant if balance available
+}
+
+
 def requires_approval(order_type: str) -> bool:
     """
     Check if an order type requires Telegram approval.
@@ -348,22 +504,15 @@ def requires_approval(order_type: str) -> bool:
     - withdrawal_wallet: YES
     - withdrawal_game: YES
     """
-    REQUIRES_APPROVAL = {
-        'wallet_load': True,
-        'deposit': True,  # Legacy
-        'withdrawal_wallet': True,
-        'withdrawal_game': True,
-        'withdrawal': True,  # Legacy
-        'game_load': False,  # Instant if balance available
-    }
-    
-    return REQUIRES_APPROVAL.get(order_type, True)  # Default to requiring approval
+    return _REQUIRES_APPROVAL_MAP.get(order_type, True)  # Default to requiring approval
+
+
+_DEFAULT_FLOW = {
+    "telegram_approval": True,
+    "description": "Unknown order type"
+}
 
 
 def get_flow_config(order_type: str) -> dict:
     """Get flow configuration for an order type."""
-    from .order_types import FLOWS
-    return FLOWS.get(order_type, {
-        "telegram_approval": True,
-        "description": "Unknown order type"
-    })
+    return FLOWS.get(order_type, _DEFAULT_FLOW)
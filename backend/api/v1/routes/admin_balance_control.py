@@ -9,14 +9,22 @@ from pydantic import BaseModel, Field
 import uuid
 from datetime import datetime, timezone
 import logging
-import json
+import os
 
+from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup
+
+from ..core import json_codec
 from ..core.database import get_pool
 from ..core.auth import get_current_user, AuthenticatedUser
 
 router = APIRouter(prefix="/admin/balance-control", tags=["admin_balance"])
 logger = logging.getLogger(__name__)
 
+# Tokens come from the environment (not hardcoded); read once at import,
+# after server.py has loaded .env
+BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN', '')
+CHAT_ID = os.environ.get('TELEGRAM_CHAT_ID', '')
+
 
 # ==================== AUTH HELPER ====================
 
@@ -36,6 +44,51 @@ async def require_admin_for_balance(
     return user
 
 
+# Fixed SQL text so asyncpg's per-connection statement cache
+# (db_statement_cache_size) reuses the prepared statements.
+# Each one looks up the user and creates the order in a single round
+# trip; no row back means the user does not exist.
+_SQL_CREATE_MANUAL_LOAD = """
+    WITH u AS (
+        SELECT user_id, username FROM users WHERE user_id = $2
+    )
+    INSERT INTO orders (
+        order_id, user_id, username,
+        order_type, amount, total_amount,
+        status, metadata, created_at
+    )
+    SELECT $1::varchar, u.user_id, u.username,
+           'admin_manual_load', $3::float8, $3::float8,
+           'pending_approval', $4::jsonb, NOW()
+    FROM u
+    RETURNING username
+"""
+
+# The order is only inserted when the balance covers the amount;
+# created = false on the returned row means insufficient balance
+_SQL_CREATE_MANUAL_WITHDRAW = """
+    WITH u AS (
+        SELECT user_id, username, real_balance FROM users WHERE user_id = $2
+    ), new_order AS (
+        INSERT INTO orders (
+            order_id, user_id, username,
+            order_type, amount, total_amount,
+            status, metadata, created_at
+        )
+        SELECT $1::varchar, u.user_id, u.username,
+               'admin_manual_withdraw', $3::float8, $3::float8,
+               'pending_approval',
+               $4::jsonb || jsonb_build_object('balance_before', u.real_balance),
+               NOW()
+        FROM u
+        WHERE u.real_balance >= $3::float8
+        RETURNING order_id
+    )
+    SELECT u.username, EXISTS (SELECT 1 FROM new_order) AS created
+    FROM u
+"""
+
+
 class ManualBalanceRequest(BaseModel):
     user_id: str
     amount: float = Field(gt=0)
@@ -61,33 +114,20 @@ async def admin_manual_load(
     pool = await get_pool()
     
     async with pool.acquire() as conn:
-        # Get user
-        user = await conn.fetchrow("""
-            SELECT user_id, username, real_balance
-            FROM users WHERE user_id = $1
-        """, request_data.user_id)
-        
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        # Create order
+        # Create order (user lookup happens in the same statement)
         order_id = str(uuid.uuid4())
         
-        await conn.execute("""
-            INSERT INTO orders (
-                order_id, user_id, username,
-                order_type, amount, total_amount,
-                status, metadata, created_at
-            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, NOW())
-        """, order_id, user['user_id'], user['username'],
-             'admin_manual_load', request_data.amount, request_data.amount,
-             'pending_approval', json.dumps({
+        user = await conn.fetchrow(_SQL_CREATE_MANUAL_LOAD, order_id, request_data.user_id,
+             request_data.amount, json_codec.dumps({
                  'reason': request_data.reason,
                  'admin_action': True,
                  'initiated_by': admin.username,
                  'requires_telegram_approval': True
              }))
         
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        
         # Send to Telegram
         background_tasks.add_task(send_admin_action_telegram, order_id, 'load', request_data.reason)
         
@@ -118,37 +158,23 @@ async def admin_manual_withdraw(
     pool = await get_pool()
     
     async with pool.acquire() as conn:
-        # Get user
-        user = await conn.fetchrow("""
-            SELECT user_id, username, real_balance
-            FROM users WHERE user_id = $1
-        """, request_data.user_id)
-        
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        if float(user['real_balance']) < request_data.amount:
-            raise HTTPException(status_code=400, detail="Insufficient balance")
-        
-        # Create order
+        # Create order (user lookup and balance check happen in the same statement)
         order_id = str(uuid.uuid4())
         
-        await conn.execute("""
-            INSERT INTO orders (
-                order_id, user_id, username,
-                order_type, amount, total_amount,
-                status, metadata, created_at
-            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, NOW())
-        """, order_id, user['user_id'], user['username'],
-             'admin_manual_withdraw', request_data.amount, request_data.amount,
-             'pending_approval', json.dumps({
+        user = await conn.fetchrow(_SQL_CREATE_MANUAL_WITHDRAW, order_id, request_data.user_id,
+             request_data.amount, json_codec.dumps({
                  'reason': request_data.reason,
                  'admin_action': True,
                  'initiated_by': admin.username,
-                 'requires_telegram_approval': True,
-                 'balance_before': float(user['real_balance'])
+                 'requires_telegram_approval': True
              }))
         
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        
+        if not user['created']:
+            raise HTTPException(status_code=400, detail="Insufficient balance")
+        
         # Send to Telegram
         background_tasks.add_task(send_admin_action_telegram, order_id, 'withdraw', request_data.reason)
         
@@ -160,15 +186,29 @@ async def admin_manual_withdraw(
         }
 
 
+# Reused across notifications so its HTTP connection pool (and TLS
+# sessions) survive between approvals
+_bot = None
+
+
+def _get_bot():
+    """Shared Bot for admin action notifications (BOT_TOKEN is fixed at import)"""
+    global _bot
+    if _bot is None:
+        _bot = Bot(token=BOT_TOKEN)
+    return _bot
+
+
+async def close_admin_bot():
+    """Shut down the shared Bot and its HTTP client (application shutdown)"""
+    global _bot
+    if _bot is not None:
+        await _bot.shutdown()
+        _bot = None
+
+
 async def send_admin_action_telegram(order_id: str, action_type: str, reason: str):
     """Send admin manual action to Telegram for approval"""
-    from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup
-    import os
-    
-    # Get tokens from environment (not hardcoded)
-    BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN', '')
-    CHAT_ID = os.environ.get('TELEGRAM_CHAT_ID', '')
-    
     if not BOT_TOKEN or not CHAT_ID:
         logger.warning("Telegram not configured - skipping notification")
         return
@@ -184,7 +224,7 @@ async def send_admin_action_telegram(order_id: str, action_type: str, reason: st
             if not order:
                 return
             
-            bot = Bot(token=BOT_TOKEN)
+            bot = _get_bot()
             
             if action_type == 'load':
                 emoji = "➕"
@@ -3,17 +3,26 @@ API v1 Admin Routes - Comprehensive Administration
 Per-client bonus, signup bonus, rules, orders, Telegram config, audit logs
 """
 from fastapi import APIRouter, Request, Header, HTTPException, status
-from typing import Optional, List
+from fastapi.responses import ORJSONResponse
+from typing import Optional, List, Tuple
 from datetime import datetime, timezone
 from pydantic import BaseModel, Field
+import asyncio
+import time
 import uuid
-import json
 
-from ..core.database import fetch_one, fetch_all, execute
+from ..core import json_codec
+from ..core.database import (
+    fetch_one, fetch_all, execute, execute_returning,
+    fetch_one_ro, fetch_all_ro, fetch_records_ro,
+)
 from ..core.config import ErrorCodes
+from ..core.order_lifecycle import enqueue_audit_row
 from .dependencies import authenticate_request, require_auth
 
-router = APIRouter(prefix="/admin", tags=["Admin"])
+# orjson encodes datetime (ISO 8601) natively, so handlers return the
+# timestamps as-is instead of formatting them row by row
+router = APIRouter(prefix="/admin", tags=["Admin"], default_response_class=ORJSONResponse)
 
 
 # ==================== AUTH HELPER ====================
@@ -22,8 +31,8 @@ async def require_admin(request: Request, authorization: str):
     """Require admin role for access"""
     auth = await require_auth(request, authorization=authorization)
     
-    admin = await fetch_one("SELECT role FROM users WHERE user_id = $1", auth.user_id)
-    if not admin or admin.get('role') != 'admin':
+    # Role was read from users by the same authentication lookup
+    if auth.role != 'admin':
         raise HTTPException(status_code=403, detail="Admin access required")
     
     return auth
@@ -109,105 +118,250 @@ class GameRulesUpdate(BaseModel):
     is_active: Optional[bool] = None
 
 
+def _coalesce_update_sql(
+    table: str,
+    model: type,
+    where: str,
+    touch_updated_at: bool = True,
+    returning: Optional[str] = None
+) -> str:
+    """
+    Fixed UPDATE text for a partial-update model: one COALESCE($n, col)
+    per model field, so a None parameter keeps the current value and the
+    statement text (and asyncpg's cached plan) never changes. `where`
+    may reference the parameter after the fields as {key}; `returning`
+    lets callers detect a missing row from the same statement.
+    """
+    columns = list(model.model_fields)
+    sets = [f"{col} = COALESCE(${i}, {col})" for i, col in enumerate(columns, 1)]
+    if touch_updated_at:
+        sets.append("updated_at = NOW()")
+    sql = f"UPDATE {table} SET {', '.join(sets)} WHERE {where.format(key=f'${len(columns) + 1}')}"
+    if returning:
+        sql += f" RETURNING {returning}"
+    return sql
+
+
+_SQL_UPDATE_CLIENT_BONUS = _coalesce_update_sql(
+    "users", ClientBonusUpdate, "user_id = {key}", returning="user_id"
+)
+_SQL_UPDATE_PERK = _coalesce_update_sql(
+    "referral_perks", PerkUpdate, "perk_id = {key}", touch_updated_at=False, returning="perk_id"
+)
+_SQL_UPDATE_SETTINGS = _coalesce_update_sql("system_settings", SystemSettingsUpdate, "id = 'global'")
+_SQL_UPDATE_GAME = _coalesce_update_sql(
+    "games", GameRulesUpdate, "game_id = {key}", touch_updated_at=False, returning="display_name"
+)
+
+
+# ==================== RESPONSE MODELS ====================
+# List endpoints return plain row dicts and let pydantic-core select and
+# serialize these fields (datetimes as ISO 8601); extra columns are dropped.
+
+class ClientOut(BaseModel):
+    """Client row in the admin client list"""
+    user_id: str
+    username: str
+    display_name: Optional[str] = None
+    email: Optional[str] = None
+    referral_code: Optional[str] = None
+    role: Optional[str] = 'user'
+    bonus_percentage: Optional[float] = 0
+    signup_bonus_claimed: Optional[bool] = False
+    deposit_count: Optional[int] = 0
+    total_deposited: Optional[float] = 0
+    total_withdrawn: Optional[float] = 0
+    real_balance: Optional[float] = 0
+    bonus_balance: Optional[float] = 0
+    deposit_locked: Optional[bool] = False
+    withdraw_locked: Optional[bool] = False
+    is_active: Optional[bool] = None
+    created_at: Optional[datetime] = None
+
+
+class OrderOut(BaseModel):
+    """Order row in the admin order list"""
+    order_id: str
+    user_id: Optional[str] = None
+    username: Optional[str] = None
+    order_type: Optional[str] = None
+    game_name: Optional[str] = None
+    amount: Optional[float] = None
+    bonus_amount: Optional[float] = None
+    total_amount: Optional[float] = None
+    referral_code: Optional[str] = None
+    status: Optional[str] = None
+    payment_proof_url: Optional[str] = None
+    rejection_reason: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+class PerkOut(BaseModel):
+    """Referral perk row in the admin perk list"""
+    perk_id: str
+    referral_code: str
+    game_name: Optional[str] = None
+    percent_bonus: Optional[float] = None
+    flat_bonus: Optional[float] = None
+    max_bonus: Optional[float] = None
+    min_amount: Optional[float] = None
+    valid_until: Optional[datetime] = None
+    max_uses: Optional[int] = None
+    current_uses: Optional[int] = 0
+    is_active: Optional[bool] = None
+    created_at: Optional[datetime] = None
+
+
 # ==================== STATS & DASHBOARD ====================
 
+_SQL_ADMIN_STATS = """
+    SELECT
+        (SELECT COUNT(*) FROM users) AS total_users,
+        (SELECT COUNT(*) FROM referral_perks WHERE is_active = TRUE) AS total_active_perks,
+        COUNT(*) AS total_orders,
+        COUNT(*) FILTER (
+            WHERE status IN ('initiated', 'pending_review', 'awaiting_payment_proof')
+        ) AS pending_orders,
+        COALESCE(SUM(amount) FILTER (
+            WHERE order_type = 'deposit' AND status = 'APPROVED_EXECUTED'
+        ), 0) AS total_volume,
+        COALESCE(SUM(bonus_amount) FILTER (
+            WHERE status = 'APPROVED_EXECUTED'
+        ), 0) AS total_bonus
+    FROM orders
+"""
+
+
 @router.get("/stats", summary="Get admin dashboard statistics")
 async def get_admin_stats(request: Request, authorization: str = Header(..., alias="Authorization")):
     """Get admin dashboard statistics"""
     auth = await require_admin(request, authorization)
     
-    total_users = (await fetch_one("SELECT COUNT(*) as count FROM users"))['count']
-    total_orders = (await fetch_one("SELECT COUNT(*) as count FROM orders"))['count']
-    total_perks = (await fetch_one("SELECT COUNT(*) as count FROM referral_perks WHERE is_active = TRUE"))['count']
-    
-    total_volume = await fetch_one(
-        "SELECT COALESCE(SUM(amount), 0) as total FROM orders WHERE order_type = 'deposit' AND status = 'APPROVED_EXECUTED'"
+    # One pass over orders feeds every aggregate; recent orders are
+    # fetched concurrently on a second pooled connection
+    stats, recent_orders = await asyncio.gather(
+        fetch_one_ro(_SQL_ADMIN_STATS),
+        fetch_all_ro('''
+            SELECT order_id, username, order_type, game_name, amount, bonus_amount, status, created_at
+            FROM orders ORDER BY created_at DESC LIMIT 10
+        '''),
     )
-    total_bonus = await fetch_one(
-        "SELECT COALESCE(SUM(bonus_amount), 0) as total FROM orders WHERE status = 'APPROVED_EXECUTED'"
-    )
-    pending_orders = (await fetch_one(
-        "SELECT COUNT(*) as count FROM orders WHERE status IN ('initiated', 'pending_review', 'awaiting_payment_proof')"
-    ))['count']
-    
-    recent_orders = await fetch_all('''
-        SELECT * FROM orders ORDER BY created_at DESC LIMIT 10
-    ''')
     
     return {
-        "total_users": total_users,
-        "total_orders": total_orders,
-        "pending_orders": pending_orders,
-        "total_active_perks": total_perks,
-        "total_volume": total_volume['total'],
-        "total_bonus_distributed": total_bonus['total'],
-        "recent_orders": [{
-            "order_id": o['order_id'],
-            "username": o['username'],
-            "order_type": o['order_type'],
-            "game_name": o.get('game_name'),
-            "amount": o['amount'],
-            "bonus_amount": o['bonus_amount'],
-            "status": o['status'],
-            "created_at": o['created_at'].isoformat() if o.get('created_at') else None
-        } for o in recent_orders]
+        "total_users": stats['total_users'],
+        "total_orders": stats['total_orders'],
+        "pending_orders": stats['pending_orders'],
+        "total_active_perks": stats['total_active_perks'],
+        "total_volume": stats['total_volume'],
+        "total_bonus_distributed": stats['total_bonus'],
+        "recent_orders": recent_orders
     }
 
 
 # ==================== CLIENT MANAGEMENT ====================
 
-@router.get("/clients", summary="List all clients/users")
+_CLIENT_COLUMNS = """
+    user_id, username, display_name, email, referral_code, role,
+    bonus_percentage, signup_bonus_claimed, deposit_count,
+    total_deposited, total_withdrawn, real_balance, bonus_balance,
+    deposit_locked, withdraw_locked, is_active, created_at
+"""
+
+# Keyset pagination: pass the last row's created_at / id as before / before_id
+# to continue after it without scanning skipped rows (OFFSET still works).
+# First pages and keyset pages are separate statements so the row comparison
+# is a plain predicate the (created_at DESC, id DESC) index can seek on, even
+# under a generic plan; an empty before_id means strictly older than before.
+def _search_clients_sql(keyset: str = "") -> str:
+    return f"""
+    SELECT {_CLIENT_COLUMNS}
+    FROM users 
+    WHERE (username ILIKE $1 OR referral_code ILIKE $1 OR display_name ILIKE $1 OR email ILIKE $1)
+      {keyset}
+    ORDER BY created_at DESC, user_id DESC
+    LIMIT $2 OFFSET $3
+"""
+
+
+def _list_clients_sql(keyset: str = "") -> str:
+    return f"""
+    SELECT {_CLIENT_COLUMNS}
+    FROM users 
+    {keyset}
+    ORDER BY created_at DESC, user_id DESC
+    LIMIT $1 OFFSET $2
+"""
+
+
+_SQL_SEARCH_CLIENTS = _search_clients_sql()
+_SQL_SEARCH_CLIENTS_BEFORE = _search_clients_sql("AND (created_at, user_id) < ($4::timestamptz, $5::text)")
+_SQL_LIST_CLIENTS = _list_clients_sql()
+_SQL_LIST_CLIENTS_BEFORE = _list_clients_sql("WHERE (created_at, user_id) < ($3::timestamptz, $4::text)")
+
+
+@router.get("/clients", summary="List all clients/users", response_model=List[ClientOut])
 async def list_clients(
     request: Request,
     search: Optional[str] = None,
     limit: int = 50,
     offset: int = 0,
+    before: Optional[datetime] = None,
+    before_id: Optional[str] = None,
     authorization: str = Header(..., alias="Authorization")
 ):
     """List all clients with their bonus settings"""
     auth = await require_admin(request, authorization)
     
-    if search:
-        users = await fetch_all('''
-            SELECT user_id, username, display_name, email, referral_code, role,
-                   bonus_percentage, signup_bonus_claimed, deposit_count,
-                   total_deposited, total_withdrawn, real_balance, bonus_balance,
-                   deposit_locked, withdraw_locked, is_active, created_at
-            FROM users 
-            WHERE username ILIKE $1 OR referral_code ILIKE $1 OR display_name ILIKE $1 OR email ILIKE $1
-            ORDER BY created_at DESC
-            LIMIT $2 OFFSET $3
-        ''', f'%{search}%', limit, offset)
+    if search and before is not None:
+        users = await fetch_all_ro(
+            _SQL_SEARCH_CLIENTS_BEFORE, f'%{search}%', limit, offset, before, before_id or ''
+        )
+    elif search:
+        users = await fetch_all_ro(_SQL_SEARCH_CLIENTS, f'%{search}%', limit, offset)
+    elif before is not None:
+        users = await fetch_all_ro(_SQL_LIST_CLIENTS_BEFORE, limit, offset, before, before_id or '')
     else:
-        users = await fetch_all('''
-            SELECT user_id, username, display_name, email, referral_code, role,
-                   bonus_percentage, signup_bonus_claimed, deposit_count,
-                   total_deposited, total_withdrawn, real_balance, bonus_balance,
-                   deposit_locked, withdraw_locked, is_active, created_at
-            FROM users 
-            ORDER BY created_at DESC
-            LIMIT $1 OFFSET $2
-        ''', limit, offset)
-    
-    return [{
-        "user_id": u['user_id'],
-        "username": u['username'],
-        "display_name": u['display_name'],
-        "email": u.get('email'),
-        "referral_code": u['referral_code'],
-        "role": u.get('role', 'user'),
-        "bonus_percentage": u.get('bonus_percentage', 0),
-        "signup_bonus_claimed": u.get('signup_bonus_claimed', False),
-        "deposit_count": u.get('deposit_count', 0),
-        "total_deposited": u.get('total_deposited', 0),
-        "total_withdrawn": u.get('total_withdrawn', 0),
-        "real_balance": u.get('real_balance', 0),
-        "bonus_balance": u.get('bonus_balance', 0),
-        "deposit_locked": u.get('deposit_locked', False),
-        "withdraw_locked": u.get('withdraw_locked', False),
-        "is_active": u['is_active'],
-        "created_at": u['created_at'].isoformat() if u.get('created_at') else None
-    } for u in users]
+        users = await fetch_all_ro(_SQL_LIST_CLIENTS, limit, offset)
+    
+    return users
+
+
+# One round trip for the whole client view: the user row (explicit
+# columns, so password_hash never leaves the database) plus identities
+# and recent orders aggregated into JSON arrays
+_SQL_CLIENT_DETAIL = """
+    SELECT u.user_id, u.username, u.display_name, u.email, u.phone, u.referral_code,
+           u.referred_by_code, u.referred_by_user_id, u.role, u.is_active, u.is_verified,
+           u.bonus_percentage, u.signup_bonus_claimed, u.deposit_count,
+           u.total_deposited, u.total_withdrawn, u.real_balance, u.bonus_balance,
+           u.play_credits, u.cash_balance, u.withdraw_locked, u.deposit_locked,
+           u.is_suspicious, u.manual_approval_only, u.no_bonus, u.visibility_level,
+           u.last_ip, u.created_at, u.updated_at,
+           (
+               SELECT COALESCE(jsonb_agg(jsonb_build_object(
+                   'identity_id', i.identity_id,
+                   'provider', i.provider,
+                   'external_id', i.external_id,
+                   'is_primary', i.is_primary
+               )), '[]'::jsonb)
+               FROM user_identities i WHERE i.user_id = u.user_id
+           ) AS identities,
+           (
+               SELECT COALESCE(jsonb_agg(jsonb_build_object(
+                   'order_id', o.order_id,
+                   'order_type', o.order_type,
+                   'amount', o.amount,
+                   'status', o.status,
+                   'created_at', o.created_at
+               ) ORDER BY o.created_at DESC), '[]'::jsonb)
+               FROM (
+                   SELECT order_id, order_type, amount, status, created_at
+                   FROM orders WHERE user_id = u.user_id
+                   ORDER BY created_at DESC LIMIT 20
+               ) o
+           ) AS recent_orders
+    FROM users u WHERE u.user_id = $1
+"""
 
 
 @router.get("/clients/{user_id}", summary="Get client details")
@@ -219,39 +373,14 @@ async def get_client(
     """Get detailed client information"""
     auth = await require_admin(request, authorization)
     
-    user = await fetch_one("SELECT * FROM users WHERE user_id = $1", user_id)
+    user = await fetch_one_ro(_SQL_CLIENT_DETAIL, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="Client not found")
     
-    # Get identities
-    identities = await fetch_all(
-        "SELECT * FROM user_identities WHERE user_id = $1", user_id
-    )
-    
-    # Get recent orders
-    orders = await fetch_all(
-        "SELECT * FROM orders WHERE user_id = $1 ORDER BY created_at DESC LIMIT 20", user_id
-    )
-    
-    # Don't return password hash
-    user.pop('password_hash', None)
-    
     return {
         **user,
-        "created_at": user['created_at'].isoformat() if user.get('created_at') else None,
-        "identities": [{
-            "identity_id": i['identity_id'],
-            "provider": i['provider'],
-            "external_id": i['external_id'],
-            "is_primary": i['is_primary']
-        } for i in identities],
-        "recent_orders": [{
-            "order_id": o['order_id'],
-            "order_type": o['order_type'],
-            "amount": o['amount'],
-            "status": o['status'],
-            "created_at": o['created_at'].isoformat() if o.get('created_at') else None
-        } for o in orders]
+        "identities": json_codec.loads(user['identities']),
+        "recent_orders": json_codec.loads(user['recent_orders'])
     }
 
 
@@ -265,82 +394,62 @@ async def update_client_bonus(
     """Update client-specific bonus and lock settings"""
     auth = await require_admin(request, authorization)
     
-    user = await fetch_one("SELECT username FROM users WHERE user_id = $1", user_id)
+    # The UPDATE doubles as the existence check (no row back -> 404)
+    values = list(data.model_dump().values())
+    if any(v is not None for v in values):
+        user = await execute_returning(_SQL_UPDATE_CLIENT_BONUS, *values, user_id)
+    else:
+        user = await fetch_one("SELECT user_id FROM users WHERE user_id = $1", user_id)
     if not user:
         raise HTTPException(status_code=404, detail="Client not found")
     
-    updates = []
-    params = []
-    
-    if data.bonus_percentage is not None:
-        params.append(data.bonus_percentage)
-        updates.append(f"bonus_percentage = ${len(params)}")
-    if data.signup_bonus_claimed is not None:
-        params.append(data.signup_bonus_claimed)
-        updates.append(f"signup_bonus_claimed = ${len(params)}")
-    if data.deposit_locked is not None:
-        params.append(data.deposit_locked)
-        updates.append(f"deposit_locked = ${len(params)}")
-    if data.withdraw_locked is not None:
-        params.append(data.withdraw_locked)
-        updates.append(f"withdraw_locked = ${len(params)}")
-    
-    if updates:
-        params.append(user_id)
-        await execute(
-            f"UPDATE users SET {', '.join(updates)}, updated_at = NOW() WHERE user_id = ${len(params)}",
-            *params
-        )
-    
-    await log_audit(auth.user_id, auth.username, "admin.client_bonus_updated", "user", user_id, data.model_dump())
+    await log_audit(auth.user_id, auth.username, "admin.client_bonus_updated", "user", user_id, data.model_dump(), durable=True)
     
     return {"success": True, "message": "Client bonus settings updated"}
 
 
 # ==================== ORDER MANAGEMENT ====================
 
-@router.get("/orders", summary="List all orders")
+# Filters are NULL-guarded so the SQL text never changes and asyncpg's
+# statement cache reuses one prepared statement per query. before /
+# before_id (the last row's created_at and id) continue a listing
+# without OFFSET, through a separate keyset statement (see clients).
+def _list_orders_sql(keyset: str = "") -> str:
+    return f"""
+    SELECT {', '.join(OrderOut.model_fields)} FROM orders
+    WHERE ($1::text IS NULL OR status = $1)
+      AND ($2::text IS NULL OR order_type = $2)
+      {keyset}
+    ORDER BY created_at DESC, order_id DESC
+    LIMIT $3 OFFSET $4
+"""
+
+
+_SQL_LIST_ORDERS = _list_orders_sql()
+_SQL_LIST_ORDERS_BEFORE = _list_orders_sql("AND (created_at, order_id) < ($5::timestamptz, $6::text)")
+
+
+@router.get("/orders", summary="List all orders", response_model=List[OrderOut])
 async def list_orders(
     request: Request,
     status_filter: Optional[str] = None,
     order_type: Optional[str] = None,
     limit: int = 50,
     offset: int = 0,
+    before: Optional[datetime] = None,
+    before_id: Optional[str] = None,
     authorization: str = Header(..., alias="Authorization")
 ):
-    """List all orders with filters"""
+    """List all orders with filters (keyset paging via before / before_id)"""
     auth = await require_admin(request, authorization)
     
-    query = "SELECT * FROM orders WHERE 1=1"
-    params = []
-    
-    if status_filter:
-        params.append(status_filter)
-        query += f" AND status = ${len(params)}"
-    if order_type:
-        params.append(order_type)
-        query += f" AND order_type = ${len(params)}"
-    
-    params.extend([limit, offset])
-    query += f" ORDER BY created_at DESC LIMIT ${len(params)-1} OFFSET ${len(params)}"
-    
-    orders = await fetch_all(query, *params)
+    filters = (status_filter or None, order_type or None, limit, offset)
+    if before is not None:
+        orders = await fetch_all_ro(_SQL_LIST_ORDERS_BEFORE, *filters, before, before_id or '')
+    else:
+        orders = await fetch_all_ro(_SQL_LIST_ORDERS, *filters)
     
-    return [{
-        "order_id": o['order_id'],
-        "user_id": o['user_id'],
-        "username": o['username'],
-        "order_type": o['order_type'],
-        "game_name": o.get('game_name'),
-        "amount": o['amount'],
-        "bonus_amount": o['bonus_amount'],
-        "total_amount": o['total_amount'],
-        "referral_code": o.get('referral_code'),
-        "status": o['status'],
-        "payment_proof_url": o.get('payment_proof_url'),
-        "rejection_reason": o.get('rejection_reason'),
-        "created_at": o['created_at'].isoformat() if o.get('created_at') else None
-    } for o in orders]
+    return orders
 
 
 @router.get("/orders/{order_id}", summary="Get order details")
@@ -352,21 +461,24 @@ async def get_order_admin(
     """Get detailed order information"""
     auth = await require_admin(request, authorization)
     
-    order = await fetch_one("SELECT * FROM orders WHERE order_id = $1", order_id)
+    order = await fetch_one_ro("SELECT * FROM orders WHERE order_id = $1", order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
-    return {
-        **order,
-        "created_at": order['created_at'].isoformat() if order.get('created_at') else None,
-        "updated_at": order['updated_at'].isoformat() if order.get('updated_at') else None,
-        "approved_at": order['approved_at'].isoformat() if order.get('approved_at') else None
-    }
+    return order
 
 
 # ==================== REFERRAL PERKS ====================
 
-@router.get("/perks", summary="List all referral perks")
+_SQL_LIST_PERKS = f"""
+    SELECT {', '.join(PerkOut.model_fields)} FROM referral_perks
+    WHERE ($1::text IS NULL OR referral_code = $1)
+      AND ($2::boolean IS NULL OR is_active = $2)
+    ORDER BY created_at DESC
+"""
+
+
+@router.get("/perks", summary="List all referral perks", response_model=List[PerkOut])
 async def list_perks(
     request: Request,
     referral_code: Optional[str] = None,
@@ -376,33 +488,23 @@ async def list_perks(
     """List all referral perks"""
     auth = await require_admin(request, authorization)
     
-    query = "SELECT * FROM referral_perks WHERE 1=1"
-    params = []
-    
-    if referral_code:
-        params.append(referral_code.upper())
-        query += f" AND referral_code = ${len(params)}"
-    if is_active is not None:
-        params.append(is_active)
-        query += f" AND is_active = ${len(params)}"
-    
-    query += " ORDER BY created_at DESC"
-    perks = await fetch_all(query, *params) if params else await fetch_all(query)
+    perks = await fetch_all_ro(
+        _SQL_LIST_PERKS, referral_code.upper() if referral_code else None, is_active
+    )
     
-    return [{
-        "perk_id": p['perk_id'],
-        "referral_code": p['referral_code'],
-        "game_name": p.get('game_name'),
-        "percent_bonus": p['percent_bonus'],
-        "flat_bonus": p['flat_bonus'],
-        "max_bonus": p.get('max_bonus'),
-        "min_amount": p.get('min_amount'),
-        "valid_until": p['valid_until'].isoformat() if p.get('valid_until') else None,
-        "max_uses": p.get('max_uses'),
-        "current_uses": p.get('current_uses', 0),
-        "is_active": p['is_active'],
-        "created_at": p['created_at'].isoformat() if p.get('created_at') else None
-    } for p in perks]
+    return perks
+
+
+_SQL_CREATE_PERK = """
+    INSERT INTO referral_perks (
+        perk_id, referral_code, game_name, percent_bonus, flat_bonus,
+        max_bonus, min_amount, valid_from, valid_until, max_uses, is_active, created_by, created_at
+    )
+    SELECT gen_random_uuid()::text, $1::varchar, $2::varchar, $3::float8, $4::float8,
+           $5::float8, $6::float8, NOW(), $7::timestamptz, $8::int, $9::boolean, $10::varchar, NOW()
+    WHERE EXISTS (SELECT 1 FROM users WHERE referral_code = $1)
+    RETURNING perk_id
+"""
 
 
 @router.post("/perks", summary="Create a referral perk")
@@ -414,27 +516,18 @@ async def create_perk(
     """Create a new referral perk"""
     auth = await require_admin(request, authorization)
     
-    # Verify referral code exists
-    user = await fetch_one(
-        "SELECT user_id FROM users WHERE referral_code = $1",
-        data.referral_code.upper()
+    # Insert only if the referral code exists; no row back means it does not
+    perk = await execute_returning(
+        _SQL_CREATE_PERK, data.referral_code.upper(), data.game_name.lower() if data.game_name else None,
+        data.percent_bonus, data.flat_bonus, data.max_bonus, data.min_amount,
+        data.valid_until, data.max_uses, data.is_active, auth.user_id
     )
-    if not user:
+    if not perk:
         raise HTTPException(status_code=400, detail="Referral code not found")
     
-    perk_id = str(uuid.uuid4())
-    now = datetime.now(timezone.utc)
+    perk_id = perk['perk_id']
     
-    await execute('''
-        INSERT INTO referral_perks (
-            perk_id, referral_code, game_name, percent_bonus, flat_bonus,
-            max_bonus, min_amount, valid_from, valid_until, max_uses, is_active, created_by, created_at
-        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13)
-    ''', perk_id, data.referral_code.upper(), data.game_name.lower() if data.game_name else None,
-        data.percent_bonus, data.flat_bonus, data.max_bonus, data.min_amount,
-        now, data.valid_until, data.max_uses, data.is_active, auth.user_id, now)
-    
-    await log_audit(auth.user_id, auth.username, "admin.perk_created", "perk", perk_id, data.model_dump())
+    await log_audit(auth.user_id, auth.username, "admin.perk_created", "perk", perk_id, data.model_dump(), durable=True)
     
     return {"success": True, "perk_id": perk_id, "message": "Perk created"}
 
@@ -449,26 +542,16 @@ async def update_perk(
     """Update an existing perk"""
     auth = await require_admin(request, authorization)
     
-    perk = await fetch_one("SELECT * FROM referral_perks WHERE perk_id = $1", perk_id)
+    # The UPDATE doubles as the existence check (no row back -> 404)
+    values = list(data.model_dump().values())
+    if any(v is not None for v in values):
+        perk = await execute_returning(_SQL_UPDATE_PERK, *values, perk_id)
+    else:
+        perk = await fetch_one("SELECT perk_id FROM referral_perks WHERE perk_id = $1", perk_id)
     if not perk:
         raise HTTPException(status_code=404, detail="Perk not found")
     
-    updates = []
-    params = []
-    
-    for field, value in data.model_dump(exclude_unset=True).items():
-        if value is not None:
-            params.append(value)
-            updates.append(f"{field} = ${len(params)}")
-    
-    if updates:
-        params.append(perk_id)
-        await execute(
-            f"UPDATE referral_perks SET {', '.join(updates)} WHERE perk_id = ${len(params)}",
-            *params
-        )
-    
-    await log_audit(auth.user_id, auth.username, "admin.perk_updated", "perk", perk_id, data.model_dump())
+    await log_audit(auth.user_id, auth.username, "admin.perk_updated", "perk", perk_id, data.model_dump(), durable=True)
     
     return {"success": True, "message": "Perk updated"}
 
@@ -483,13 +566,21 @@ async def delete_perk(
     auth = await require_admin(request, authorization)
     
     await execute("UPDATE referral_perks SET is_active = FALSE WHERE perk_id = $1", perk_id)
-    await log_audit(auth.user_id, auth.username, "admin.perk_deleted", "perk", perk_id)
+    await log_audit(auth.user_id, auth.username, "admin.perk_deleted", "perk", perk_id, durable=True)
     
     return {"success": True, "message": "Perk deleted"}
 
 
 # ==================== RULES ENGINE ====================
 
+_SQL_LIST_RULES = """
+    SELECT * FROM rules
+    WHERE ($1::text IS NULL OR rule_type = $1)
+      AND ($2::text IS NULL OR scope = $2)
+    ORDER BY priority DESC, created_at DESC
+"""
+
+
 @router.get("/rules", summary="List all rules")
 async def list_rules(
     request: Request,
@@ -500,18 +591,7 @@ async def list_rules(
     """List all deposit/withdrawal rules"""
     auth = await require_admin(request, authorization)
     
-    query = "SELECT * FROM rules WHERE 1=1"
-    params = []
-    
-    if rule_type:
-        params.append(rule_type)
-        query += f" AND rule_type = ${len(params)}"
-    if scope:
-        params.append(scope)
-        query += f" AND scope = ${len(params)}"
-    
-    query += " ORDER BY priority DESC, created_at DESC"
-    rules = await fetch_all(query, *params) if params else await fetch_all(query)
+    rules = await fetch_all_ro(_SQL_LIST_RULES, rule_type or None, scope or None)
     
     return [{
         "rule_id": r['rule_id'],
@@ -519,11 +599,11 @@ async def list_rules(
         "scope": r['scope'],
         "scope_id": r.get('scope_id'),
         "priority": r['priority'],
-        "conditions": json.loads(r['conditions']) if isinstance(r['conditions'], str) else r['conditions'],
-        "actions": json.loads(r['actions']) if isinstance(r['actions'], str) else r['actions'],
+        "conditions": json_codec.loads(r['conditions']) if isinstance(r['conditions'], str) else r['conditions'],
+        "actions": json_codec.loads(r['actions']) if isinstance(r['actions'], str) else r['actions'],
         "is_active": r['is_active'],
-        "valid_from": r['valid_from'].isoformat() if r.get('valid_from') else None,
-        "valid_until": r['valid_until'].isoformat() if r.get('valid_until') else None
+        "valid_from": r.get('valid_from'),
+        "valid_until": r.get('valid_until')
     } for r in rules]
 
 
@@ -536,13 +616,13 @@ async def create_rule(
     """Create a deposit/withdrawal rule"""
     auth = await require_admin(request, authorization)
     
-    rule_id = str(uuid.uuid4())
-    
-    await execute('''
+    rule = await execute_returning('''
         INSERT INTO rules (rule_id, rule_type, scope, scope_id, priority, conditions, actions, is_active, valid_from, valid_until, created_at)
-        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, NOW())
-    ''', rule_id, data.rule_type, data.scope, data.scope_id, data.priority,
-        json.dumps(data.conditions), json.dumps(data.actions), data.is_active, data.valid_from, data.valid_until)
+        VALUES (gen_random_uuid()::text, $1, $2, $3, $4, $5, $6, $7, $8, $9, NOW())
+        RETURNING rule_id
+    ''', data.rule_type, data.scope, data.scope_id, data.priority,
+        json_codec.dumps(data.conditions), json_codec.dumps(data.actions), data.is_active, data.valid_from, data.valid_until)
+    rule_id = rule['rule_id']
     
     await log_audit(auth.user_id, auth.username, "admin.rule_created", "rule", rule_id, data.model_dump())
     
@@ -571,6 +651,49 @@ async def delete_rule(
 
 # ==================== SYSTEM SETTINGS ====================
 
+# Settings and games change rarely but are polled by the admin UI. Rows
+# are cached in-process for a few seconds and dropped on local updates;
+# writes from other workers or modules show up once the TTL lapses.
+# Misses load from the primary, not the read replica: a lagging replica
+# read right after an update would cache the pre-update row.
+_READ_CACHE_TTL = 5.0
+
+_settings_cache: Optional[Tuple[float, Optional[dict]]] = None
+_games_cache: Optional[Tuple[float, List[dict]]] = None
+
+
+async def _get_global_settings() -> Optional[dict]:
+    """The system_settings 'global' row, cached for _READ_CACHE_TTL seconds"""
+    global _settings_cache
+    now = time.monotonic()
+    if _settings_cache is not None and now - _settings_cache[0] < _READ_CACHE_TTL:
+        return _settings_cache[1]
+    settings = await fetch_one("SELECT * FROM system_settings WHERE id = 'global'")
+    _settings_cache = (now, settings)
+    return settings
+
+
+async def _get_games() -> List[dict]:
+    """All game rows by display name, cached for _READ_CACHE_TTL seconds"""
+    global _games_cache
+    now = time.monotonic()
+    if _games_cache is not None and now - _games_cache[0] < _READ_CACHE_TTL:
+        return _games_cache[1]
+    games = await fetch_all("SELECT * FROM games ORDER BY display_name")
+    _games_cache = (now, games)
+    return games
+
+
+def _invalidate_settings_cache() -> None:
+    global _settings_cache
+    _settings_cache = None
+
+
+def _invalidate_games_cache() -> None:
+    global _games_cache
+    _games_cache = None
+
+
 @router.get("/settings", summary="Get system settings")
 async def get_system_settings(
     request: Request,
@@ -579,7 +702,7 @@ async def get_system_settings(
     """Get system settings including rules engine config"""
     auth = await require_admin(request, authorization)
     
-    settings = await fetch_one("SELECT * FROM system_settings WHERE id = 'global'")
+    settings = await _get_global_settings()
     if not settings:
         return {"configured": False}
     
@@ -610,22 +733,12 @@ async def update_system_settings(
     """Update system settings"""
     auth = await require_admin(request, authorization)
     
-    updates = []
-    params = []
-    
-    for field, value in data.model_dump(exclude_unset=True).items():
-        if value is not None:
-            params.append(value)
-            updates.append(f"{field} = ${len(params)}")
+    values = list(data.model_dump().values())
+    if any(v is not None for v in values):
+        await execute(_SQL_UPDATE_SETTINGS, *values)
+        _invalidate_settings_cache()
     
-    if updates:
-        updates.append("updated_at = NOW()")
-        await execute(
-            f"UPDATE system_settings SET {', '.join(updates)} WHERE id = 'global'",
-            *params
-        )
-    
-    await log_audit(auth.user_id, auth.username, "admin.settings_updated", "config", "global", data.model_dump())
+    await log_audit(auth.user_id, auth.username, "admin.settings_updated", "config", "global", data.model_dump(), durable=True)
     
     return {"success": True, "message": "Settings updated"}
 
@@ -640,7 +753,7 @@ async def list_games_admin(
     """List all games with their rules"""
     auth = await require_admin(request, authorization)
     
-    games = await fetch_all("SELECT * FROM games ORDER BY display_name")
+    games = await _get_games()
     
     return [{
         "game_id": g['game_id'],
@@ -651,9 +764,9 @@ async def list_games_admin(
         "max_deposit_amount": g['max_deposit_amount'],
         "min_withdrawal_amount": g['min_withdrawal_amount'],
         "max_withdrawal_amount": g['max_withdrawal_amount'],
-        "bonus_rules": json.loads(g['bonus_rules']) if isinstance(g.get('bonus_rules'), str) else g.get('bonus_rules', {}),
-        "deposit_rules": json.loads(g['deposit_rules']) if isinstance(g.get('deposit_rules'), str) else g.get('deposit_rules', {}),
-        "withdrawal_rules": json.loads(g['withdrawal_rules']) if isinstance(g.get('withdrawal_rules'), str) else g.get('withdrawal_rules', {}),
+        "bonus_rules": json_codec.loads(g['bonus_rules']) if isinstance(g.get('bonus_rules'), str) else g.get('bonus_rules', {}),
+        "deposit_rules": json_codec.loads(g['deposit_rules']) if isinstance(g.get('deposit_rules'), str) else g.get('deposit_rules', {}),
+        "withdrawal_rules": json_codec.loads(g['withdrawal_rules']) if isinstance(g.get('withdrawal_rules'), str) else g.get('withdrawal_rules', {}),
         "is_active": g['is_active']
     } for g in games]
 
@@ -668,53 +781,45 @@ async def update_game_rules(
     """Update game-specific rules and limits"""
     auth = await require_admin(request, authorization)
     
-    game = await fetch_one("SELECT * FROM games WHERE game_id = $1", game_id)
+    # JSONB parameters are passed as encoded text
+    values = [
+        json_codec.dumps(v) if isinstance(v, dict) else v
+        for v in data.model_dump().values()
+    ]
+    # The UPDATE doubles as the existence check (no row back -> 404)
+    if any(v is not None for v in values):
+        game = await execute_returning(_SQL_UPDATE_GAME, *values, game_id)
+        _invalidate_games_cache()
+    else:
+        game = await fetch_one("SELECT display_name FROM games WHERE game_id = $1", game_id)
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
     
-    updates = []
-    params = []
-    
-    if data.min_deposit_amount is not None:
-        params.append(data.min_deposit_amount)
-        updates.append(f"min_deposit_amount = ${len(params)}")
-    if data.max_deposit_amount is not None:
-        params.append(data.max_deposit_amount)
-        updates.append(f"max_deposit_amount = ${len(params)}")
-    if data.min_withdrawal_amount is not None:
-        params.append(data.min_withdrawal_amount)
-        updates.append(f"min_withdrawal_amount = ${len(params)}")
-    if data.max_withdrawal_amount is not None:
-        params.append(data.max_withdrawal_amount)
-        updates.append(f"max_withdrawal_amount = ${len(params)}")
-    if data.deposit_rules is not None:
-        params.append(json.dumps(data.deposit_rules))
-        updates.append(f"deposit_rules = ${len(params)}")
-    if data.withdrawal_rules is not None:
-        params.append(json.dumps(data.withdrawal_rules))
-        updates.append(f"withdrawal_rules = ${len(params)}")
-    if data.bonus_rules is not None:
-        params.append(json.dumps(data.bonus_rules))
-        updates.append(f"bonus_rules = ${len(params)}")
-    if data.is_active is not None:
-        params.append(data.is_active)
-        updates.append(f"is_active = ${len(params)}")
-    
-    if updates:
-        params.append(game_id)
-        updates.append("updated_at = NOW()")
-        await execute(
-            f"UPDATE games SET {', '.join(updates)} WHERE game_id = ${len(params)}",
-            *params
-        )
-    
-    await log_audit(auth.user_id, auth.username, "admin.game_rules_updated", "game", game_id, data.model_dump())
+    await log_audit(auth.user_id, auth.username, "admin.game_rules_updated", "game", game_id, data.model_dump(), durable=True)
     
     return {"success": True, "message": f"Game rules updated for {game['display_name']}"}
 
 
 # ==================== AUDIT LOGS ====================
 
+def _audit_logs_sql(keyset: str = "") -> str:
+    return f"""
+    SELECT log_id, user_id, username, action, resource_type, resource_id,
+           details, ip_address, created_at
+    FROM audit_logs
+    WHERE ($1::text IS NULL OR user_id = $1)
+      AND ($2::text IS NULL OR action ILIKE $2)
+      AND ($3::text IS NULL OR resource_type = $3)
+      {keyset}
+    ORDER BY created_at DESC, log_id DESC
+    LIMIT $4
+"""
+
+
+_SQL_AUDIT_LOGS = _audit_logs_sql()
+_SQL_AUDIT_LOGS_BEFORE = _audit_logs_sql("AND (created_at, log_id) < ($5::timestamptz, $6::text)")
+
+
 @router.get("/audit-logs", summary="Get audit logs")
 async def get_audit_logs(
     request: Request,
@@ -722,28 +827,23 @@ async def get_audit_logs(
     action: Optional[str] = None,
     resource_type: Optional[str] = None,
     limit: int = 100,
+    before: Optional[datetime] = None,
+    before_id: Optional[str] = None,
     authorization: str = Header(..., alias="Authorization")
 ):
-    """Get audit logs with filters"""
+    """Get audit logs with filters (keyset paging via before / before_id)"""
     auth = await require_admin(request, authorization)
     
-    query = "SELECT * FROM audit_logs WHERE 1=1"
-    params = []
-    
-    if user_id:
-        params.append(user_id)
-        query += f" AND user_id = ${len(params)}"
-    if action:
-        params.append(f"%{action}%")
-        query += f" AND action ILIKE ${len(params)}"
-    if resource_type:
-        params.append(resource_type)
-        query += f" AND resource_type = ${len(params)}"
-    
-    params.append(limit)
-    query += f" ORDER BY created_at DESC LIMIT ${len(params)}"
-    
-    logs = await fetch_all(query, *params)
+    filters = (
+        user_id or None,
+        f"%{action}%" if action else None,
+        resource_type or None,
+        limit,
+    )
+    if before is not None:
+        logs = await fetch_records_ro(_SQL_AUDIT_LOGS_BEFORE, *filters, before, before_id or '')
+    else:
+        logs = await fetch_records_ro(_SQL_AUDIT_LOGS, *filters)
     
     return [{
         "log_id": l['log_id'],
@@ -752,19 +852,36 @@ async def get_audit_logs(
         "action": l['action'],
         "resource_type": l.get('resource_type'),
         "resource_id": l.get('resource_id'),
-        "details": json.loads(l['details']) if isinstance(l.get('details'), str) else l.get('details'),
+        "details": json_codec.loads(l['details']) if isinstance(l.get('details'), str) else l.get('details'),
         "ip_address": l.get('ip_address'),
-        "created_at": l['created_at'].isoformat() if l.get('created_at') else None
+        "created_at": l.get('created_at')
     } for l in logs]
 
 
 # ==================== HELPER ====================
 
-async def log_audit(user_id, username, action, resource_type, resource_id, details=None):
-    """Log an audit event"""
-    log_id = str(uuid.uuid4())
-    await execute('''
-        INSERT INTO audit_logs (log_id, user_id, username, action, resource_type, resource_id, details)
-        VALUES ($1, $2, $3, $4, $5, $6, $7)
-    ''', log_id, user_id, username, action, resource_type, resource_id,
-       json.dumps(details) if details else None)
+_SQL_INSERT_AUDIT_LOG = """
+    INSERT INTO audit_logs (log_id, user_id, username, action, resource_type, resource_id, details)
+    VALUES ($1, $2, $3, $4, $5, $6, $7)
+"""
+
+
+async def log_audit(user_id, username, action, resource_type, resource_id, details=None, durable=False):
+    """
+    Log an audit event.
+    
+    By default the row is queued for the batched background audit writer.
+    durable=True writes it inline and raises if the INSERT fails, for
+    balance, settings, perk and game-rule changes whose audit trail must
+    not be lost.
+    """
+    if durable:
+        await execute(
+            _SQL_INSERT_AUDIT_LOG, str(uuid.uuid4()), user_id, username, action,
+            resource_type, resource_id, json_codec.dumps(details) if details else None
+        )
+        return
+    await enqueue_audit_row(
+        str(uuid.uuid4()), user_id, username, action, resource_id,
+        details or None, datetime.now(timezone.utc), resource_type=resource_type
+    )
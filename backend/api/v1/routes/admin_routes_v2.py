@@ -17,6 +17,7 @@ from fastapi import APIRouter, Request, Header, HTTPException, status
 from typing import Optional, List
 from datetime import datetime, timezone, timedelta
 from pydantic import BaseModel, Field
+import asyncio
 import uuid
 import json
 import secrets
@@ -112,60 +113,56 @@ class ApprovalAction(BaseModel):
 
 # ==================== 1. DASHBOARD (READ-ONLY OVERVIEW) ====================
 
+# Rollups are maintained by triggers on orders (see init_api_v1_db) and
+# striped across rows, so every figure is a SUM over the stripes
+_SQL_DASHBOARD_ROLLUP = """
+    SELECT t.pending_total, t.pending_deposits, t.pending_withdrawals, t.net_profit,
+           d.deposits_in, d.withdrawals_out, d.voided_today
+    FROM (
+        SELECT COALESCE(SUM(pending_total), 0)::bigint AS pending_total,
+               COALESCE(SUM(pending_deposits), 0)::bigint AS pending_deposits,
+               COALESCE(SUM(pending_withdrawals), 0)::bigint AS pending_withdrawals,
+               COALESCE(SUM(deposits_in - withdrawals_out), 0)::float8 AS net_profit
+        FROM order_rollup_totals
+    ) t
+    CROSS JOIN (
+        SELECT COALESCE(SUM(deposits_in), 0)::float8 AS deposits_in,
+               COALESCE(SUM(withdrawals_out), 0)::float8 AS withdrawals_out,
+               COALESCE(SUM(voided), 0)::float8 AS voided_today
+        FROM order_rollup_daily
+        WHERE day = (NOW() AT TIME ZONE 'UTC')::date
+    ) d
+"""
+
+
 @router.get("/dashboard", summary="Dashboard overview - read-only")
 async def get_dashboard(request: Request, authorization: str = Header(...)):
     """Quick health check overview ONLY"""
     auth = await require_admin_access(request, authorization)
     
-    # Get today's date range
-    today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-    
-    # Pending approvals
-    pending = await fetch_one("""
-        SELECT 
-            COUNT(*) FILTER (WHERE status IN ('pending_review', 'awaiting_payment_proof')) as pending_total,
-            COUNT(*) FILTER (WHERE status IN ('pending_review', 'awaiting_payment_proof') AND order_type = 'deposit') as pending_deposits,
-            COUNT(*) FILTER (WHERE status IN ('pending_review', 'awaiting_payment_proof') AND order_type = 'withdrawal') as pending_withdrawals
-        FROM orders
-    """)
-    
-    # Today's flow - handle both legacy 'approved' and canonical 'APPROVED_EXECUTED' statuses
-    today_flow = await fetch_one("""
-        SELECT 
-            COALESCE(SUM(amount) FILTER (WHERE order_type = 'deposit' AND status IN ('approved', 'APPROVED_EXECUTED') AND approved_at >= $1), 0) as deposits_in,
-            COALESCE(SUM(payout_amount) FILTER (WHERE order_type = 'withdrawal' AND status IN ('approved', 'APPROVED_EXECUTED') AND approved_at >= $1), 0) as withdrawals_out,
-            COALESCE(SUM(void_amount) FILTER (WHERE status IN ('approved', 'APPROVED_EXECUTED') AND approved_at >= $1), 0) as voided_today
-        FROM orders
-    """, today_start)
-    
-    # Total profit calculation - handle both legacy and canonical statuses
-    profit = await fetch_one("""
-        SELECT 
-            COALESCE(SUM(amount) FILTER (WHERE order_type = 'deposit' AND status IN ('approved', 'APPROVED_EXECUTED')), 0) -
-            COALESCE(SUM(payout_amount) FILTER (WHERE order_type = 'withdrawal' AND status IN ('approved', 'APPROVED_EXECUTED')), 0) as net_profit
-        FROM orders
-    """)
-    
-    # Active clients
-    active_clients = await fetch_one("""
-        SELECT COUNT(*) as count FROM users WHERE is_active = TRUE AND role = 'user'
-    """)
-    
-    # System status
-    system = await fetch_one("SELECT * FROM system_settings WHERE id = 'global'")
+    # Independent reads, run concurrently on separate pooled connections:
+    # order rollups (pending counts, today's UTC flow, lifetime profit),
+    # active clients and system status
+    rollup, active_clients, system = await asyncio.gather(
+        fetch_one(_SQL_DASHBOARD_ROLLUP),
+        fetch_one("""
+            SELECT COUNT(*) as count FROM users WHERE is_active = TRUE AND role = 'user'
+        """),
+        fetch_one("SELECT * FROM system_settings WHERE id = 'global'"),
+    )
     
     return {
         "pending_approvals": {
-            "total": pending['pending_total'],
-            "deposits": pending['pending_deposits'],
-            "withdrawals": pending['pending_withdrawals']
+            "total": rollup['pending_total'],
+            "deposits": rollup['pending_deposits'],
+            "withdrawals": rollup['pending_withdrawals']
         },
         "today": {
-            "deposits_in": round(today_flow['deposits_in'], 2),
-            "withdrawals_out": round(today_flow['withdrawals_out'], 2),
-            "voided": round(today_flow['voided_today'], 2)
+            "deposits_in": round(rollup['deposits_in'], 2),
+            "withdrawals_out": round(rollup['withdrawals_out'], 2),
+            "voided": round(rollup['voided_today'], 2)
         },
-        "net_profit": round(profit['net_profit'], 2),
+        "net_profit": round(rollup['net_profit'], 2),
         "active_clients": active_clients['count'],
         "system_status": {
             "api_enabled": system.get('api_enabled', True) if system else True,
@@ -278,32 +275,40 @@ async def list_orders(
     """List all orders with filters"""
     auth = await require_admin_access(request, authorization)
     
-    query = "SELECT * FROM orders WHERE 1=1"
-    count_query = "SELECT COUNT(*) FROM orders WHERE 1=1"
+    # Suspicious-only is a join (not a per-row subquery) so the planner can
+    # drive it from the partial index on suspicious users
+    from_clause = "FROM orders o"
+    if suspicious_only:
+        from_clause += " JOIN users u ON u.user_id = o.user_id AND u.is_suspicious = TRUE"
+    
+    # Filtered pages count their matches in the same scan (window count);
+    # the unfiltered list reports the planner's estimate instead
+    filtered = bool(status_filter or order_type or suspicious_only)
+    total_column = ", COUNT(*) OVER() AS total_count" if filtered else ""
+    query = f"SELECT o.*{total_column} {from_clause} WHERE 1=1"
+    count_query = f"SELECT COUNT(*) {from_clause} WHERE 1=1"
     params = []
     
     if status_filter:
         params.append(status_filter)
-        query += f" AND status = ${len(params)}"
-        count_query += f" AND status = ${len(params)}"
+        query += f" AND o.status = ${len(params)}"
+        count_query += f" AND o.status = ${len(params)}"
     if order_type:
         params.append(order_type)
-        query += f" AND order_type = ${len(params)}"
-        count_query += f" AND order_type = ${len(params)}"
-    if suspicious_only:
-        query += " AND (SELECT is_suspicious FROM users WHERE users.user_id = orders.user_id) = TRUE"
-        count_query += " AND (SELECT is_suspicious FROM users WHERE users.user_id = orders.user_id) = TRUE"
-    
-    total = await fetch_one(count_query, *params) if params else await fetch_one(count_query)
+        query += f" AND o.order_type = ${len(params)}"
+        count_query += f" AND o.order_type = ${len(params)}"
     
     params.extend([limit, offset])
-    query += f" ORDER BY created_at DESC LIMIT ${len(params)-1} OFFSET ${len(params)}"
+    query += f" ORDER BY o.created_at DESC LIMIT ${len(params)-1} OFFSET ${len(params)}"
     
-    orders = await fetch_all(query, *params)
+    orders, total, total_estimated = await fetch_page_with_total(
+        query, count_query, params, offset, "orders", filtered
+    )
     
     return {
         "orders": [format_order_list(o) for o in orders],
-        "total": total['count'],
+        "total": total,
+        "total_estimated": total_estimated,
         "limit": limit,
         "offset": offset
     }
@@ -505,7 +510,12 @@ async def list_clients(
     """List clients with filters"""
     auth = await require_admin_access(request, authorization)
     
-    query = "SELECT * FROM users WHERE role = 'user'"
+    # Filtered pages count their matches in the same scan (window count);
+    # the unfiltered list reports the planner's estimate for users instead
+    # (which also includes the handful of admin rows)
+    filtered = bool(search) or filter_type in ('suspicious', 'referred', 'non_referred')
+    total_column = ", COUNT(*) OVER() AS total_count" if filtered else ""
+    query = f"SELECT *{total_column} FROM users WHERE role = 'user'"
     count_query = "SELECT COUNT(*) FROM users WHERE role = 'user'"
     params = []
     
@@ -524,21 +534,91 @@ async def list_clients(
         query += " AND referred_by_code IS NULL"
         count_query += " AND referred_by_code IS NULL"
     
-    total = await fetch_one(count_query, *params) if params else await fetch_one(count_query)
-    
     params.extend([limit, offset])
     query += f" ORDER BY created_at DESC LIMIT ${len(params)-1} OFFSET ${len(params)}"
     
-    users = await fetch_all(query, *params)
+    users, total, total_estimated = await fetch_page_with_total(
+        query, count_query, params, offset, "users", filtered
+    )
     
     return {
         "clients": [format_client_list(u) for u in users],
-        "total": total['count'],
+        "total": total,
+        "total_estimated": total_estimated,
         "limit": limit,
         "offset": offset
     }
 
 
+async def _fetch_client_game_credentials(user_id: str) -> List[dict]:
+    """Game credentials for a client ([] if the table has not been created yet)"""
+    try:
+        return await fetch_all("""
+            SELECT game_id, game_user_id, created_at
+            FROM game_credentials
+            WHERE user_id = $1
+        """, user_id) or []
+    except Exception:
+        return []
+
+
+# Client view in one round trip: the user row, totals over all of the
+# client's orders, overrides and the last 20 orders (aggregated into JSON).
+# game_credentials is created on first use, so it stays a separate query.
+_SQL_CLIENT_DETAIL = """
+    SELECT u.user_id, u.username, u.display_name, u.email, u.referral_code, u.referred_by_code,
+           u.role, u.is_active, u.is_verified,
+           u.real_balance, u.bonus_balance, u.play_credits,
+           u.total_deposited, u.total_withdrawn, u.created_at,
+           u.withdraw_locked, u.deposit_locked, u.is_suspicious, u.visibility_level,
+           t.deposits_in, t.withdrawals_out, t.deposit_count, t.withdrawal_count,
+           (
+               SELECT jsonb_build_object(
+                   'custom_deposit_bonus', co.custom_deposit_bonus,
+                   'custom_cashout_min', co.custom_cashout_min,
+                   'custom_cashout_max', co.custom_cashout_max,
+                   'manual_approval_required', co.manual_approval_required,
+                   'bonus_disabled', co.bonus_disabled,
+                   'withdraw_disabled', co.withdraw_disabled
+               )
+               FROM client_overrides co WHERE co.user_id = u.user_id
+           ) AS overrides,
+           (
+               SELECT COALESCE(jsonb_agg(jsonb_build_object(
+                   'order_id', o.order_id,
+                   'order_type', o.order_type,
+                   'game_name', o.game_name,
+                   'amount', o.amount,
+                   'status', o.status,
+                   'bonus_amount', o.bonus_amount,
+                   'payout_amount', o.payout_amount,
+                   'void_amount', o.void_amount,
+                   'void_reason', o.void_reason,
+                   'created_at', o.created_at,
+                   'approved_at', o.approved_at
+               ) ORDER BY o.created_at DESC), '[]'::jsonb)
+               FROM (
+                   SELECT order_id, order_type, game_name, amount, status,
+                          bonus_amount, payout_amount, void_amount, void_reason,
+                          created_at, approved_at
+                   FROM orders WHERE user_id = u.user_id
+                   ORDER BY created_at DESC LIMIT 20
+               ) o
+           ) AS recent_orders
+    FROM users u
+    CROSS JOIN LATERAL (
+        SELECT
+            COALESCE(SUM(amount) FILTER (WHERE order_type = 'deposit' AND status IN ('approved', 'APPROVED_EXECUTED')), 0) as deposits_in,
+            COALESCE(SUM(payout_amount) FILTER (WHERE order_type = 'withdrawal' AND status IN ('approved', 'APPROVED_EXECUTED')), 0) as withdrawals_out,
+            COUNT(*) FILTER (WHERE order_type = 'deposit') as deposit_count,
+            COUNT(*) FILTER (WHERE order_type = 'withdrawal') as withdrawal_count
+        FROM orders
+        WHERE user_id = u.user_id
+    ) t
+    WHERE u.user_id = $1
+"""
+
+
 @router.get("/clients/{user_id}", summary="Get client detail with history")
 async def get_client_detail(
     request: Request,
@@ -548,55 +628,20 @@ async def get_client_detail(
     """Get detailed client information including balances, stats, orders, flags"""
     auth = await require_admin_access(request, authorization)
     
-    # Get user info
-    user = await fetch_one("""
-        SELECT user_id, username, display_name, email, referral_code, referred_by_code,
-               role, is_active, is_verified,
-               real_balance, bonus_balance, play_credits,
-               total_deposited, total_withdrawn, created_at,
-               withdraw_locked, deposit_locked, is_suspicious, visibility_level
-        FROM users
-        WHERE user_id = $1
-    """, user_id)
+    # Two pooled connections: the client view and its game credentials
+    user, game_credentials = await asyncio.gather(
+        fetch_one(_SQL_CLIENT_DETAIL, user_id),
+        _fetch_client_game_credentials(user_id),
+    )
     
     if not user:
         raise HTTPException(status_code=404, detail="Client not found")
     
-    # Get orders history
-    orders = await fetch_all("""
-        SELECT order_id, order_type, game_name, amount, status, 
-               bonus_amount, payout_amount, void_amount, void_reason,
-               created_at, approved_at
-        FROM orders
-        WHERE user_id = $1
-        ORDER BY created_at DESC
-        LIMIT 20
-    """, user_id)
-    
-    # Get game credentials
-    game_credentials = []
-    # Check if table exists before querying
-    try:
-        game_credentials = await fetch_all("""
-            SELECT game_id, game_user_id, created_at
-            FROM game_credentials
-            WHERE user_id = $1
-        """, user_id) or []
-    except:
-        pass
-    
-    # Get overrides/flags
-    overrides = await fetch_one("""
-        SELECT custom_deposit_bonus, custom_cashout_min, custom_cashout_max,
-               manual_approval_required, bonus_disabled, withdraw_disabled
-        FROM client_overrides
-        WHERE user_id = $1
-    """, user_id)
-    
     # Build response matching frontend expectations
-    # Calculate financial summary
-    deposits_in = sum(float(o.get('amount', 0)) for o in orders if o.get('order_type') == 'deposit' and o.get('status') == 'approved')
-    withdrawals_out = sum(float(o.get('payout_amount', 0) or 0) for o in orders if o.get('order_type') == 'withdrawal' and o.get('status') == 'approved')
+    orders = json.loads(user['recent_orders'])
+    overrides = json.loads(user['overrides']) if user['overrides'] else None
+    deposits_in = user['deposits_in']
+    withdrawals_out = user['withdrawals_out']
     
     return {
         "client": {
@@ -628,7 +673,7 @@ async def get_client_detail(
                 "transaction_id": o['order_id'],
                 "type": 'IN' if o.get('order_type') == 'deposit' else 'OUT',
                 "amount": float(o.get('amount', 0)),
-                "created_at": o['created_at'].isoformat() if o.get('created_at') else None
+                "created_at": o.get('created_at')
             }
             for o in orders[:10]
         ],
@@ -645,8 +690,8 @@ async def get_client_detail(
             "total_withdrawn": float(user.get('total_withdrawn', 0) or 0),
             "total_in": deposits_in,
             "total_out": withdrawals_out,
-            "deposit_count": len([o for o in orders if o.get('order_type') == 'deposit']),
-            "withdrawal_count": len([o for o in orders if o.get('order_type') == 'withdrawal'])
+            "deposit_count": user['deposit_count'],
+            "withdrawal_count": user['withdrawal_count']
         },
         "flags": {
             "manual_approval_required": overrides.get('manual_approval_required', False) if overrides else False,
@@ -1563,6 +1608,38 @@ async def legacy_settings_update(request: Request, authorization: str = Header(.
 
 # ==================== HELPERS ====================
 
+async def fetch_page_with_total(
+    query: str, count_query: str, params: list, offset: int, table: str, filtered: bool
+):
+    """
+    Run a list page query and work out its total without a separate COUNT scan.
+    
+    `query` ends in LIMIT/OFFSET (the last two params). Filtered pages must
+    also select `COUNT(*) OVER() AS total_count`; unfiltered pages use the
+    planner's row estimate for `table`. Returns (rows, total, total_estimated).
+    """
+    if filtered:
+        rows = await fetch_all(query, *params)
+        if rows:
+            return rows, rows[0]['total_count'], False
+        if offset == 0:
+            return rows, 0, False
+    else:
+        rows, estimate = await asyncio.gather(
+            fetch_all(query, *params),
+            fetch_one(
+                "SELECT reltuples::bigint AS estimate FROM pg_class WHERE oid = $1::regclass", table
+            ),
+        )
+        # reltuples is -1 until the table has been vacuumed/analyzed
+        if estimate and estimate['estimate'] >= 0:
+            return rows, estimate['estimate'], True
+    
+    # Past the last row (no window count to read) or no estimate yet
+    total = await fetch_one(count_query, *params[:-2])
+    return rows, total['count'], False
+
+
 def format_order_list(o: dict) -> dict:
     return {
         "order_id": o['order_id'],
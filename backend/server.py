@@ -256,12 +256,21 @@ async def startup_event():
     """Application startup handler."""
     logger.info(f"Starting Gaming Platform API v1 (ENV={settings.env})")
     
+    # Write structured logs from a background thread
+    from api.v1.core.structured_logging import start_structured_log_writer
+    start_structured_log_writer()
+    
     # Initialize database
     await init_api_v1_db()
     
     # Initialize order lifecycle audit table
-    from api.v1.core.order_lifecycle import ensure_audit_table_exists
+    from api.v1.core.order_lifecycle import ensure_audit_table_exists, start_audit_flusher
     await ensure_audit_table_exists()
+    start_audit_flusher()
+    
+    # Expire old webhook replay-protection entries in the background
+    from api.v1.core.webhook_security import start_replay_cache_sweeper
+    start_replay_cache_sweeper()
     
     # Log configuration summary
     logger.info(f"Database pool: min={settings.db_pool_min}, max={settings.db_pool_max}")
@@ -276,7 +285,19 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Application shutdown handler."""
+    # Drains in-flight notifications, which still use the DB pool, so it
+    # must run before close_api_v1_db()
+    from api.v1.core.notification_router import close_telegram_client
+    await close_telegram_client()
+    from api.v1.routes.admin_balance_control import close_admin_bot
+    await close_admin_bot()
+    from api.v1.core.webhook_security import stop_replay_cache_sweeper
+    await stop_replay_cache_sweeper()
+    from api.v1.core.order_lifecycle import stop_audit_flusher
+    await stop_audit_flusher()
     await close_api_v1_db()
+    from api.v1.core.structured_logging import stop_structured_log_writer
+    stop_structured_log_writer()
     logger.info("Application shutdown complete")
 
 
@@ -0,0 +1,75 @@
+"""
+Admin Update Statement Tests
+Runs the fixed COALESCE UPDATE statements built in routes/admin_routes against
+the schema created by init_api_v1_db, so a model field without a matching
+column (or a missing updated_at) fails here instead of as a 500:
+- client bonus, perk, system settings and game rules updates
+- all-NULL parameters leave the row untouched
+
+Needs a disposable PostgreSQL database: set TEST_DATABASE_URL.
+"""
+import asyncio
+import os
+import sys
+import uuid
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from api.v1.core import database  # noqa: E402
+from api.v1.routes import admin_routes  # noqa: E402
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+
+def _nulls(model):
+    return [None] * len(model.model_fields)
+
+
+class TestCoalesceUpdateStatements:
+    """Every COALESCE UPDATE statement runs against the real schema"""
+
+    def test_statements_run_against_schema(self, monkeypatch):
+        monkeypatch.setattr(database.settings, "database_url", TEST_DATABASE_URL)
+        monkeypatch.setattr(database.settings, "database_read_url", "")
+
+        async def scenario():
+            await database.init_api_v1_db()
+            try:
+                # All-NULL parameters: every column is kept as it is
+                await database.execute(
+                    admin_routes._SQL_UPDATE_SETTINGS, *_nulls(admin_routes.SystemSettingsUpdate)
+                )
+                await database.execute_returning(
+                    admin_routes._SQL_UPDATE_CLIENT_BONUS, *_nulls(admin_routes.ClientBonusUpdate), str(uuid.uuid4())
+                )
+                await database.execute_returning(
+                    admin_routes._SQL_UPDATE_PERK, *_nulls(admin_routes.PerkUpdate), str(uuid.uuid4())
+                )
+                await database.execute_returning(
+                    admin_routes._SQL_UPDATE_GAME, *_nulls(admin_routes.GameRulesUpdate), str(uuid.uuid4())
+                )
+
+                # Settings fields that only the rules engine reads are persisted too
+                before = await database.fetch_one("SELECT * FROM system_settings WHERE id = 'global'")
+                data = admin_routes.SystemSettingsUpdate(deposit_block_balance=7.5, max_cashout_multiplier=4.0)
+                try:
+                    await database.execute(admin_routes._SQL_UPDATE_SETTINGS, *data.model_dump().values())
+                    after = await database.fetch_one("SELECT * FROM system_settings WHERE id = 'global'")
+                    assert after['deposit_block_balance'] == 7.5
+                    assert after['max_cashout_multiplier'] == 4.0
+                    assert after['min_cashout_multiplier'] == before['min_cashout_multiplier']
+                    assert after['signup_bonus'] == before['signup_bonus']
+                finally:
+                    await database.execute("""
+                        UPDATE system_settings
+                        SET deposit_block_balance = $1, max_cashout_multiplier = $2
+                        WHERE id = 'global'
+                    """, before['deposit_block_balance'], before['max_cashout_multiplier'])
+            finally:
+                await database.close_api_v1_db()
+
+        asyncio.run(scenario())
@@ -0,0 +1,136 @@
+"""
+Queued Audit Writer Tests
+Unit tests for the background audit writer in core/order_lifecycle:
+- enqueue_audit_row with the flusher running (rows batched into one COPY)
+- enqueue_audit_row with the flusher stopped (direct write)
+- stop_audit_flusher draining queued rows
+- COPY retry and row-by-row fallback that only drops the bad row
+"""
+import asyncio
+import os
+import sys
+from datetime import datetime, timezone
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from api.v1.core import order_lifecycle  # noqa: E402
+
+
+def _row(n):
+    return (
+        f"log-{n}", "user-1", "alice", "admin.test", "order-1",
+        {"n": n}, datetime(2026, 1, 1, tzinfo=timezone.utc),
+    )
+
+
+def _queued_row(n):
+    """_row(n) as stored on the queue (resource_type in place)"""
+    row = _row(n)
+    return row[:4] + ("order",) + row[4:]
+
+
+@pytest.fixture
+def audit_db(monkeypatch):
+    """Record COPY batches and single-row INSERTs instead of hitting Postgres"""
+    calls = {"copies": [], "inserts": [], "copy_failures": 0, "bad_ids": set()}
+
+    async def fake_copy(records):
+        if calls["copy_failures"]:
+            calls["copy_failures"] -= 1
+            raise RuntimeError("copy failed")
+        if any(r[0] in calls["bad_ids"] for r in records):
+            raise RuntimeError("constraint violation")
+        calls["copies"].append(list(records))
+
+    async def fake_execute(query, *args):
+        if args[0] in calls["bad_ids"]:
+            raise RuntimeError("constraint violation")
+        calls["inserts"].append(args)
+        return "INSERT 0 1"
+
+    monkeypatch.setattr(order_lifecycle, "_copy_audit_records", fake_copy)
+    monkeypatch.setattr(order_lifecycle, "execute", fake_execute)
+    yield calls
+    # Never leave a flusher running into the next test
+    assert order_lifecycle._audit_flusher_task is None
+
+
+class TestEnqueueAuditRow:
+    """enqueue_audit_row with the background flusher running and stopped"""
+
+    def test_rows_batched_when_flusher_running(self, audit_db):
+        """Rows queued together are written by a single COPY"""
+        async def scenario():
+            order_lifecycle.start_audit_flusher()
+            for n in range(5):
+                await order_lifecycle.enqueue_audit_row(*_row(n))
+            assert audit_db["copies"] == []  # queued, not written inline
+            await order_lifecycle.stop_audit_flusher()
+
+        asyncio.run(scenario())
+        assert len(audit_db["copies"]) == 1
+        assert [r[0] for r in audit_db["copies"][0]] == [f"log-{n}" for n in range(5)]
+        # details are JSON-encoded, resource_type defaults to 'order'
+        assert audit_db["copies"][0][0][4] == "order"
+        assert audit_db["copies"][0][0][6] == '{"n":0}'
+
+    def test_direct_write_when_flusher_stopped(self, audit_db):
+        """Without a running flusher the row is written before the call returns"""
+        asyncio.run(order_lifecycle.enqueue_audit_row(*_row(1), resource_type="perk"))
+        assert len(audit_db["copies"]) == 1
+        assert audit_db["copies"][0][0][0] == "log-1"
+        assert audit_db["copies"][0][0][4] == "perk"
+
+    def test_direct_write_when_queue_full(self, audit_db, monkeypatch):
+        """A full queue falls back to writing the row directly"""
+        monkeypatch.setattr(order_lifecycle, "_AUDIT_QUEUE_MAX", 1)
+
+        async def scenario():
+            order_lifecycle.start_audit_flusher()
+            order_lifecycle._audit_queue.put_nowait(_queued_row(0))
+            await order_lifecycle.enqueue_audit_row(*_row(1))
+            assert [r[0] for r in audit_db["copies"][0]] == ["log-1"]
+            await order_lifecycle.stop_audit_flusher()
+
+        asyncio.run(scenario())
+        assert [r[0] for b in audit_db["copies"] for r in b] == ["log-1", "log-0"]
+
+
+class TestStopAuditFlusher:
+    """stop_audit_flusher flushes what is queued before stopping"""
+
+    def test_stop_drains_queued_rows(self, audit_db):
+        async def scenario():
+            order_lifecycle.start_audit_flusher()
+            for n in range(450):
+                await order_lifecycle.enqueue_audit_row(*_row(n))
+            await order_lifecycle.stop_audit_flusher()
+
+        asyncio.run(scenario())
+        written = [r[0] for b in audit_db["copies"] for r in b]
+        assert written == [f"log-{n}" for n in range(450)]
+        assert all(len(b) <= order_lifecycle._AUDIT_BATCH_SIZE for b in audit_db["copies"])
+        assert order_lifecycle._audit_queue is None
+
+
+class TestFlushFailures:
+    """A failed COPY is retried, then written row by row"""
+
+    def test_transient_copy_failure_retried(self, audit_db):
+        audit_db["copy_failures"] = 1
+        asyncio.run(order_lifecycle._flush_audit_rows(
+            [_queued_row(n) for n in range(3)]
+        ))
+        assert [r[0] for r in audit_db["copies"][0]] == ["log-0", "log-1", "log-2"]
+        assert audit_db["inserts"] == []
+
+    def test_bad_row_only_drops_itself(self, audit_db, caplog):
+        audit_db["bad_ids"] = {"log-1"}
+        asyncio.run(order_lifecycle._flush_audit_rows(
+            [_queued_row(n) for n in range(3)]
+        ))
+        assert audit_db["copies"] == []
+        assert [a[0] for a in audit_db["inserts"]] == ["log-0", "log-2"]
+        assert "log-1" in caplog.text
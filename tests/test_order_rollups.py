@@ -0,0 +1,133 @@
+"""
+Order Rollup Tests
+Checks that the trigger-maintained dashboard rollups (order_rollup_totals /
+order_rollup_daily) match the FILTER aggregates over orders they replaced:
+- after inserts in every relevant status / type
+- after status transitions and amount changes
+- after deletes
+- after reseeding from scratch
+
+Needs a disposable PostgreSQL database: set TEST_DATABASE_URL.
+"""
+import asyncio
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from api.v1.core import database  # noqa: E402
+from api.v1.routes.admin_routes_v2 import _SQL_DASHBOARD_ROLLUP  # noqa: E402
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+# The dashboard aggregates the rollups replaced
+_SQL_PENDING = """
+    SELECT
+        COUNT(*) FILTER (WHERE status IN ('pending_review', 'awaiting_payment_proof')) as pending_total,
+        COUNT(*) FILTER (WHERE status IN ('pending_review', 'awaiting_payment_proof') AND order_type = 'deposit') as pending_deposits,
+        COUNT(*) FILTER (WHERE status IN ('pending_review', 'awaiting_payment_proof') AND order_type = 'withdrawal') as pending_withdrawals
+    FROM orders
+"""
+_SQL_TODAY_FLOW = """
+    SELECT
+        COALESCE(SUM(amount) FILTER (WHERE order_type = 'deposit' AND status IN ('approved', 'APPROVED_EXECUTED') AND approved_at >= $1), 0) as deposits_in,
+        COALESCE(SUM(payout_amount) FILTER (WHERE order_type = 'withdrawal' AND status IN ('approved', 'APPROVED_EXECUTED') AND approved_at >= $1), 0) as withdrawals_out,
+        COALESCE(SUM(void_amount) FILTER (WHERE status IN ('approved', 'APPROVED_EXECUTED') AND approved_at >= $1), 0) as voided_today
+    FROM orders
+"""
+_SQL_PROFIT = """
+    SELECT
+        COALESCE(SUM(amount) FILTER (WHERE order_type = 'deposit' AND status IN ('approved', 'APPROVED_EXECUTED')), 0) -
+        COALESCE(SUM(payout_amount) FILTER (WHERE order_type = 'withdrawal' AND status IN ('approved', 'APPROVED_EXECUTED')), 0) as net_profit
+    FROM orders
+"""
+
+
+async def _assert_rollups_match():
+    today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    pending = await database.fetch_one(_SQL_PENDING)
+    today_flow = await database.fetch_one(_SQL_TODAY_FLOW, today_start)
+    profit = await database.fetch_one(_SQL_PROFIT)
+    rollup = await database.fetch_one(_SQL_DASHBOARD_ROLLUP)
+
+    assert rollup['pending_total'] == pending['pending_total']
+    assert rollup['pending_deposits'] == pending['pending_deposits']
+    assert rollup['pending_withdrawals'] == pending['pending_withdrawals']
+    assert round(rollup['deposits_in'], 2) == round(today_flow['deposits_in'], 2)
+    assert round(rollup['withdrawals_out'], 2) == round(today_flow['withdrawals_out'], 2)
+    assert round(rollup['voided_today'], 2) == round(today_flow['voided_today'], 2)
+    assert round(rollup['net_profit'], 2) == round(profit['net_profit'], 2)
+
+
+async def _insert_order(user_id, order_type, status, amount, approved_at=None, payout=0.0, void=0.0):
+    order_id = str(uuid.uuid4())
+    await database.execute("""
+        INSERT INTO orders (order_id, user_id, username, order_type, amount, total_amount,
+                            payout_amount, void_amount, status, approved_at)
+        VALUES ($1, $2, 'rollup_test', $3, $4, $4, $5, $6, $7, $8)
+    """, order_id, user_id, order_type, amount, payout, void, status, approved_at)
+    return order_id
+
+
+class TestOrderRollups:
+    """Trigger-maintained rollups agree with the FILTER aggregates"""
+
+    def test_rollups_track_insert_transition_delete(self, monkeypatch):
+        monkeypatch.setattr(database.settings, "database_url", TEST_DATABASE_URL)
+        monkeypatch.setattr(database.settings, "database_read_url", "")
+
+        async def scenario():
+            await database.init_api_v1_db()
+            user_id = str(uuid.uuid4())
+            suffix = user_id[:8]
+            await database.execute("""
+                INSERT INTO users (user_id, username, password_hash, display_name, referral_code)
+                VALUES ($1, $2, 'x', 'Rollup Test', $3)
+            """, user_id, f"rollup_{suffix}", f"RT{suffix}")
+            try:
+                now = datetime.now(timezone.utc)
+                yesterday = now - timedelta(days=1)
+
+                # Inserts across statuses, types and approval days
+                pending_dep = await _insert_order(user_id, "deposit", "pending_review", 10.10)
+                pending_wd = await _insert_order(user_id, "withdrawal", "awaiting_payment_proof", 20.20, payout=20.20)
+                await _insert_order(user_id, "deposit", "approved", 30.30, approved_at=now)
+                old_wd = await _insert_order(user_id, "withdrawal", "APPROVED_EXECUTED", 40.40, approved_at=yesterday, payout=35.35, void=5.05)
+                await _insert_order(user_id, "deposit", "APPROVED_EXECUTED", 50.50)  # no approved_at
+                rejected = await _insert_order(user_id, "deposit", "rejected", 60.60)
+                await _assert_rollups_match()
+
+                # Transitions and amount changes
+                await database.execute(
+                    "UPDATE orders SET status = 'APPROVED_EXECUTED', approved_at = $2 WHERE order_id = $1",
+                    pending_dep, now
+                )
+                await database.execute(
+                    "UPDATE orders SET status = 'APPROVED_EXECUTED', approved_at = $2, payout_amount = 18.0, void_amount = 2.2 WHERE order_id = $1",
+                    pending_wd, now
+                )
+                await database.execute("UPDATE orders SET approved_at = $2 WHERE order_id = $1", old_wd, now)
+                await database.execute("UPDATE orders SET status = 'pending_review' WHERE order_id = $1", rejected)
+                await database.execute("UPDATE orders SET username = 'rollup_test2' WHERE user_id = $1", user_id)
+                await _assert_rollups_match()
+
+                # Deletes
+                await database.execute("DELETE FROM orders WHERE order_id = ANY($1::text[])", [old_wd, rejected])
+                await _assert_rollups_match()
+
+                # Reseed from scratch gives the same numbers
+                await database.execute("DELETE FROM order_rollup_totals")
+                await database.init_api_v1_db()
+                await _assert_rollups_match()
+            finally:
+                await database.execute("DELETE FROM orders WHERE user_id = $1", user_id)
+                await database.execute("DELETE FROM users WHERE user_id = $1", user_id)
+                await database.close_api_v1_db()
+
+        asyncio.run(scenario())